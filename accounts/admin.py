@@ -1,8 +1,36 @@
+from django import forms
 from django.contrib import admin
-from accounts.models import Account, PersonalInfo, ContactInfo, AddressInfo, AvatarInfo, Code, Registration
+from accounts.models import (
+    Account,
+    AccountClosure,
+    PersonalInfo,
+    ContactInfo,
+    AddressInfo,
+    AvatarInfo,
+    Code,
+    Registration,
+)
+from accounts.services import add_account_to_referral_tree, move_account_in_referral_tree
+
+
+class AccountAdminForm(forms.ModelForm):
+    class Meta:
+        model = Account
+        fields = "__all__"
+
+    def clean_referrer(self):
+        referrer = self.cleaned_data.get("referrer")
+        if (
+            referrer
+            and self.instance.pk
+            and AccountClosure.objects.filter(ancestor=self.instance, descendant=referrer).exists()
+        ):
+            raise forms.ValidationError("Referrer cannot be a downline of the Account")
+        return referrer
 
 
 class AccountAdmin(admin.ModelAdmin):
+    form = AccountAdminForm
     list_display = (
         "id",
         "first_name",
@@ -16,6 +44,13 @@ class AccountAdmin(admin.ModelAdmin):
 
     search_fields = ("=id",)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            add_account_to_referral_tree(obj)
+        elif "referrer" in form.changed_data:
+            move_account_in_referral_tree(obj)
+
     class Meta:
         model = Account
         verbose_name_plural = "Accounts"
@@ -41,6 +76,7 @@ class CodeAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Account, AccountAdmin)
+admin.site.register(AccountClosure)
 admin.site.register(PersonalInfo)
 admin.site.register(ContactInfo)
 admin.site.register(AddressInfo)
@@ -45,6 +45,8 @@ class AccountAdminListViewSet(ModelViewSet):
     serializer_class = AccountsListSerializer
     permission_classes = [IsDeveloperUser | IsAdminUser | IsStaffUser]
     http_method_names = ["get"]
+    pagination_ordering = ("-id",)
+    pagination_offset = True
 
     def get_queryset(self):
         return Account.objects.exclude(is_deleted=True).all()
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from accounts.services import rebuild_referral_tree
+
+
+class Command(BaseCommand):
+    help = "Recompute the Account referral closure table from Account referrers"
+
+    def handle(self, *args, **options):
+        links = rebuild_referral_tree()
+        self.stdout.write(self.style.SUCCESS("Rebuilt %s referral paths." % (len(links))))
@@ -98,46 +98,32 @@ class Account(models.Model):
     def get_account_number(self):
         return str(self.id).zfill(5)
 
-    def get_all_children(self, children=None):
-        if children is None:
-            children = []
-        for account in self.children.all():
-            children.append(account)
-            account.get_all_children(children)
-        return children
-
-    def get_all_referrers(self, referrers=None):
-        if referrers is None:
-            referrers = []
-        if self.referrer:
-            referrers.append(self.referrer)
-            self.referrer.get_all_referrers(referrers)
-        return referrers
-
-    def get_four_level_referrers(self, referrers=None, level=None):
-        if referrers is None:
-            referrers = []
-            level = 1
-            referrers.append(
-                {
-                    "account": self,
-                    "level": level,
-                }
-            )
-        if self.referrer:
-            level = level + 1
-            if level > 4:
-                return referrers
-
-            referrers.append(
-                {
-                    "account": self.referrer,
-                    "level": level,
-                }
-            )
-
-            self.referrer.get_four_level_referrers(referrers, level)
-        return referrers
+    def get_all_children(self):
+        return list(self.get_downline())
+
+    def get_all_referrers(self):
+        return [link.ancestor for link in self.get_upline_links(min_depth=1)]
+
+    def get_four_level_referrers(self):
+        return [{"account": link.ancestor, "level": link.depth + 1} for link in self.get_upline_links(max_depth=3)]
+
+    def get_upline_links(self, min_depth=0, max_depth=None):
+        links = self.ancestor_links.filter(depth__gte=min_depth)
+        if max_depth is not None:
+            links = links.filter(depth__lte=max_depth)
+        return links.select_related("ancestor").order_by("depth")
+
+    def get_downline(self, levels=None):
+        links = {"ancestor_links__ancestor": self, "ancestor_links__depth__gt": 0}
+        if levels is not None:
+            links["ancestor_links__depth__lte"] = levels
+        return Account.objects.filter(**links).annotate(level=F("ancestor_links__depth")).order_by("level", "id")
+
+    def get_descendants_count(self, levels=None):
+        links = self.descendant_links.filter(depth__gt=0)
+        if levels is not None:
+            links = links.filter(depth__lte=levels)
+        return links.count()
 
     def get_membership_level_points(self, membership_level=None):
         return (
@@ -154,6 +140,24 @@ class Account(models.Model):
         return "%s" % (self.get_full_name())
 
 
+class AccountClosure(models.Model):
+    ancestor = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="descendant_links")
+    descendant = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="ancestor_links")
+    depth = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("ancestor", "descendant"), name="one_path_per_ancestor_descendant"),
+        ]
+        indexes = [
+            models.Index(fields=("ancestor", "depth")),
+            models.Index(fields=("descendant", "depth")),
+        ]
+
+    def __str__(self):
+        return "%s > %s : %s" % (self.ancestor, self.descendant, self.depth)
+
+
 class PersonalInfo(models.Model):
     account = models.OneToOneField(Account, on_delete=models.CASCADE, related_name="personal_info")
     birthdate = models.DateField(
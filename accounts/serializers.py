@@ -1,6 +1,8 @@
+from django.db import transaction
 from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
 from accounts.models import Account, PersonalInfo, ContactInfo, AddressInfo, AvatarInfo, Code, CashoutMethod
+from accounts.services import add_account_to_referral_tree
 from orders.serializers import OrdersListSerializer
 from core.models import MembershipLevel
 from core.serializers import ActivitiesSerializer
@@ -176,15 +178,17 @@ class CreateUpdateAccountSerializer(ModelSerializer):
         avatar_info = validated_data.pop("avatar_info")
         code = validated_data.pop("code")
         address_info = validated_data.pop("address_info")
-        account = Account.objects.create(**validated_data)
+        with transaction.atomic():
+            account = Account.objects.create(**validated_data)
+            add_account_to_referral_tree(account)
 
-        PersonalInfo.objects.create(**personal_info, account=account)
-        ContactInfo.objects.create(**contact_info, account=account)
-        AvatarInfo.objects.create(**avatar_info, account=account)
-        Code.objects.create(**code, account=account)
+            PersonalInfo.objects.create(**personal_info, account=account)
+            ContactInfo.objects.create(**contact_info, account=account)
+            AvatarInfo.objects.create(**avatar_info, account=account)
+            Code.objects.create(**code, account=account)
 
-        for address in address_info:
-            AddressInfo.objects.create(**address, account=account)
+            for address in address_info:
+                AddressInfo.objects.create(**address, account=account)
 
         return account
 
@@ -2,18 +2,19 @@ import string, random
 import json
 from tzlocal import get_localzone
 from django.core.signing import Signer, BadSignature
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from accounts.enums import AccountStatus, CodeStatus
-from accounts.models import Registration, Code, CashoutMethod, AddressInfo
+from accounts.models import Account, AccountClosure, Registration, Code, CashoutMethod, AddressInfo
 from orders.models import Order, Customer
 from core.enums import Settings
 from core.models import CashoutMethods
-from core.services import get_setting
+from core.services import get_int_setting
 from users.services import create_new_user
 
 
 def generate_code():
-    size = int(get_setting(Settings.CODE_LENGTH))
+    size = get_int_setting(Settings.CODE_LENGTH)
     chars = string.ascii_uppercase + string.digits
     return "".join(random.choice(chars) for _ in range(size))
 
@@ -162,3 +163,58 @@ def transform_account_form_data_to_json(request):
 
 def undefault_all_address_info(request):
     return AddressInfo.objects.filter(account__user=request.user).update(is_default=False)
+
+
+def add_account_to_referral_tree(account):
+    links = [AccountClosure(ancestor=account, descendant=account, depth=0)]
+    if account.referrer_id:
+        for ancestor_id, depth in AccountClosure.objects.filter(descendant_id=account.referrer_id).values_list(
+            "ancestor_id", "depth"
+        ):
+            links.append(AccountClosure(ancestor_id=ancestor_id, descendant=account, depth=depth + 1))
+
+    return AccountClosure.objects.bulk_create(links)
+
+
+def move_account_in_referral_tree(account):
+    with transaction.atomic():
+        subtree = list(AccountClosure.objects.filter(ancestor=account).values_list("descendant_id", "depth"))
+        subtree_ids = [descendant_id for descendant_id, depth in subtree]
+        if account.referrer_id in subtree_ids:
+            raise ValueError("Referrer cannot be a downline of the Account")
+
+        AccountClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+        if account.referrer_id:
+            ancestors = AccountClosure.objects.filter(descendant_id=account.referrer_id).values_list(
+                "ancestor_id", "depth"
+            )
+            AccountClosure.objects.bulk_create(
+                [
+                    AccountClosure(
+                        ancestor_id=ancestor_id,
+                        descendant_id=descendant_id,
+                        depth=ancestor_depth + descendant_depth + 1,
+                    )
+                    for ancestor_id, ancestor_depth in ancestors
+                    for descendant_id, descendant_depth in subtree
+                ],
+                batch_size=1000,
+            )
+
+
+def rebuild_referral_tree():
+    referrers = dict(Account.objects.values_list("id", "referrer_id"))
+    links = []
+    for account_id in referrers:
+        ancestor_id = account_id
+        depth = 0
+        visited = set()
+        while ancestor_id is not None and ancestor_id not in visited:
+            visited.add(ancestor_id)
+            links.append(AccountClosure(ancestor_id=ancestor_id, descendant_id=account_id, depth=depth))
+            ancestor_id = referrers.get(ancestor_id)
+            depth += 1
+
+    with transaction.atomic():
+        AccountClosure.objects.all().delete()
+        return AccountClosure.objects.bulk_create(links, batch_size=1000)
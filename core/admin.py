@@ -1,5 +1,22 @@
 from django.contrib import admin
-from core.models import Setting, MembershipLevel, Activity, ActivityDetails, CashoutMethods
+from django.db import transaction
+from core.models import Setting, MembershipLevel, Activity, ActivityDetails, CashoutMethods, WalletBalance
+from core.services import invalidate_settings_cache
+
+
+class SettingAdmin(admin.ModelAdmin):
+    list_display = ("property", "value")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(invalidate_settings_cache)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(invalidate_settings_cache)
+
+    class Meta:
+        model = Setting
 
 
 class ActivityAdmin(admin.ModelAdmin):
@@ -13,8 +30,18 @@ class ActivityAdmin(admin.ModelAdmin):
         verbose_name_plural = "Activities"
 
 
-admin.site.register(Setting)
+class WalletBalanceAdmin(admin.ModelAdmin):
+    list_display = ("account", "wallet", "membership_level", "balance", "cashout_total", "modified")
+    search_fields = ("account__id",)
+    list_filter = ("wallet", "membership_level")
+
+    class Meta:
+        model = WalletBalance
+
+
+admin.site.register(Setting, SettingAdmin)
 admin.site.register(MembershipLevel)
 admin.site.register(Activity, ActivityAdmin)
 admin.site.register(ActivityDetails)
+admin.site.register(WalletBalance, WalletBalanceAdmin)
 admin.site.register(CashoutMethods)
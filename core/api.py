@@ -1,5 +1,6 @@
-from django.db.models import Case, Value, When, Sum, F, Q, DecimalField, Count, Prefetch
-from django.db.models.functions import Coalesce
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value, Count
 from rest_framework import status, views, permissions
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
@@ -15,23 +16,26 @@ from core.serializers import (
     ActivityCashoutInfoSerializer,
 )
 from core.services import (
-    check_if_has_cashout_today,
-    check_if_has_pending_cashout,
     compute_cashout_total,
     compute_conversion_amount,
     compute_minimum_cashout_amount,
     compute_minimum_conversion_amount,
     create_company_earning_activity,
     create_payout_activity,
+    get_cashout_eligibility,
     get_cashout_processing_fee_percentage,
+    get_membership_level_balances,
     get_setting,
-    get_wallet_can_cashout,
+    get_wallet_balance,
     get_wallet_cashout_schedule,
+    InsufficientWalletBalance,
+    invalidate_settings_cache,
     process_create_cashout_request,
     process_point_conversion,
     process_update_cashout_status,
 )
 from users.models import User
+from vanguard.idempotency import idempotent
 from vanguard.permissions import IsDeveloperUser, IsAdminUser, IsStaffUser, IsMemberUser
 from orders.models import Order
 
@@ -93,9 +97,15 @@ class ActivitiesListMemberViewSet(ModelViewSet):
     serializer_class = ActivitiesSerializer
     permission_classes = [IsMemberUser]
     http_method_names = ["get"]
+    pagination_ordering = ("-id",)
 
     def get_queryset(self):
-        return Activity.objects.filter(account__user=self.request.user).order_by("-id")
+        return (
+            Activity.objects.filter(account__user=self.request.user)
+            .select_related("account", "membership_level")
+            .prefetch_related("details__created_by")
+            .order_by("-id")
+        )
 
 
 class CashoutAdminListViewSet(ModelViewSet):
@@ -103,9 +113,15 @@ class CashoutAdminListViewSet(ModelViewSet):
     serializer_class = ActivityCashoutListSerializer
     permission_classes = [IsDeveloperUser | IsAdminUser | IsStaffUser]
     http_method_names = ["get"]
+    pagination_ordering = ("-id",)
+    pagination_offset = True
 
     def get_queryset(self):
-        queryset = Activity.objects.filter(activity_type=ActivityType.CASHOUT).exclude(is_deleted=True)
+        queryset = (
+            Activity.objects.filter(activity_type=ActivityType.CASHOUT)
+            .exclude(is_deleted=True)
+            .select_related("account")
+        )
 
         return queryset
 
@@ -119,8 +135,11 @@ class CashoutAdminInfoViewSet(ModelViewSet):
     def get_queryset(self):
         activity_number = self.request.query_params.get("activity_number", None)
         if activity_number is not None:
-            queryset = Activity.objects.filter(activity_type=ActivityType.CASHOUT, id=activity_number).exclude(
-                is_deleted=True
+            queryset = (
+                Activity.objects.filter(activity_type=ActivityType.CASHOUT, id=activity_number)
+                .exclude(is_deleted=True)
+                .select_related("account")
+                .prefetch_related("details__created_by")
             )
 
             return queryset
@@ -135,9 +154,14 @@ class CashoutMemberInfoViewSet(ModelViewSet):
     def get_queryset(self):
         activity_number = self.request.query_params.get("activity_number", None)
         if activity_number is not None:
-            return Activity.objects.filter(
-                activity_type=ActivityType.CASHOUT, account__user=self.request.user, id=activity_number
-            ).exclude(is_deleted=True)
+            return (
+                Activity.objects.filter(
+                    activity_type=ActivityType.CASHOUT, account__user=self.request.user, id=activity_number
+                )
+                .exclude(is_deleted=True)
+                .select_related("account")
+                .prefetch_related("details__created_by")
+            )
 
 
 class CashoutMemberListViewSet(ModelViewSet):
@@ -147,8 +171,10 @@ class CashoutMemberListViewSet(ModelViewSet):
     http_method_names = ["get"]
 
     def get_queryset(self):
-        return Activity.objects.filter(activity_type=ActivityType.CASHOUT, account__user=self.request.user).exclude(
-            is_deleted=True
+        return (
+            Activity.objects.filter(activity_type=ActivityType.CASHOUT, account__user=self.request.user)
+            .exclude(is_deleted=True)
+            .select_related("account")
         )
 
 
@@ -158,60 +184,10 @@ class GetMembershipLevelPointsAdminView(views.APIView):
     def post(self, request, *args, **kwargs):
         account_id = request.data.get("account_id")
         if account_id:
-            membership_level_points = (
-                MembershipLevel.objects.prefetch_related(
-                    Prefetch("activities", queryset=Activity.objects.filter(account__account_id=account_id))
-                )
-                .annotate(
-                    total=Coalesce(
-                        Sum("activities__activity_amount", filter=Q(activities__account__account_id=account_id)),
-                        0,
-                        output_field=DecimalField(),
-                    )
-                )
-                .values("name", "total")
-                .order_by("id")
-            )
-
-            member_wallet_total = (
-                (
-                    Activity.objects.filter(wallet=WalletType.M_WALLET, account__account_id=account_id)
-                    .values("activity_type")
-                    .annotate(
-                        activity_total=Case(
-                            When(
-                                Q(activity_type=ActivityType.CASHOUT) & ~Q(status=ActivityStatus.DENIED),
-                                then=0 - (Sum(F("activity_amount"))),
-                            ),
-                            When(
-                                ~Q(activity_type=ActivityType.CASHOUT),
-                                then=Sum(F("activity_amount")),
-                            ),
-                        ),
-                    )
-                    .order_by("-activity_total")
-                )
-                .aggregate(total=Coalesce(Sum("activity_total"), 0, output_field=DecimalField()))
-                .get("total")
-            )
-
-            member_wallet_total_cashout = (
-                (
-                    Activity.objects.filter(wallet=WalletType.M_WALLET, account__account_id=account_id)
-                    .values("activity_type")
-                    .annotate(
-                        activity_total=Case(
-                            When(
-                                Q(activity_type=ActivityType.CASHOUT),
-                                then=Sum(F("activity_amount")),
-                            ),
-                        ),
-                    )
-                    .order_by("-activity_total")
-                )
-                .aggregate(total=Coalesce(Sum("activity_total"), 0, output_field=DecimalField()))
-                .get("total")
-            )
+            membership_level_points = get_membership_level_balances(account__account_id=account_id)
+            member_wallet = get_wallet_balance(WalletType.M_WALLET, account__account_id=account_id)
+            member_wallet_total = member_wallet.get("balance")
+            member_wallet_total_cashout = member_wallet.get("cashout_total")
 
             return Response(
                 data={
@@ -231,60 +207,10 @@ class GetMembershipLevelPointsMemberView(views.APIView):
     permission_classes = [IsMemberUser]
 
     def post(self, request, *args, **kwargs):
-        membership_level_points = (
-            MembershipLevel.objects.prefetch_related(
-                Prefetch("activities", queryset=Activity.objects.filter(account__user=self.request.user))
-            )
-            .annotate(
-                total=Coalesce(
-                    Sum("activities__activity_amount", filter=Q(activities__account__user=self.request.user)),
-                    0,
-                    output_field=DecimalField(),
-                )
-            )
-            .values("name", "total")
-            .order_by("id")
-        )
-
-        member_wallet_total = (
-            (
-                Activity.objects.filter(wallet=WalletType.M_WALLET, account__user=self.request.user)
-                .values("activity_type")
-                .annotate(
-                    activity_total=Case(
-                        When(
-                            Q(activity_type=ActivityType.CASHOUT) & ~Q(status=ActivityStatus.DENIED),
-                            then=0 - (Sum(F("activity_amount"))),
-                        ),
-                        When(
-                            ~Q(activity_type=ActivityType.CASHOUT),
-                            then=Sum(F("activity_amount")),
-                        ),
-                    ),
-                )
-                .order_by("-activity_total")
-            )
-            .aggregate(total=Coalesce(Sum("activity_total"), 0, output_field=DecimalField()))
-            .get("total")
-        )
-
-        member_wallet_total_cashout = (
-            (
-                Activity.objects.filter(wallet=WalletType.M_WALLET, account__user=self.request.user)
-                .values("activity_type")
-                .annotate(
-                    activity_total=Case(
-                        When(
-                            Q(activity_type=ActivityType.CASHOUT),
-                            then=Sum(F("activity_amount")),
-                        ),
-                    ),
-                )
-                .order_by("-activity_total")
-            )
-            .aggregate(total=Coalesce(Sum("activity_total"), 0, output_field=DecimalField()))
-            .get("total")
-        )
+        membership_level_points = get_membership_level_balances(account__user=self.request.user)
+        member_wallet = get_wallet_balance(WalletType.M_WALLET, account__user=self.request.user)
+        member_wallet_total = member_wallet.get("balance")
+        member_wallet_total_cashout = member_wallet.get("cashout_total")
 
         return Response(
             data={
@@ -319,39 +245,9 @@ class GetMaxPointConversionAmountView(views.APIView):
         membership_level = request.data.get("membership_level")
         amount = request.data.get("amount")
         if amount is not None and membership_level is not None:
-            activities = (
-                Activity.objects.filter(account__user=self.request.user.pk, membership_level=membership_level)
-                .values("activity_type")
-                .annotate(
-                    running_total=Case(
-                        When(
-                            ~Q(activity_type=ActivityType.POINT_CONVERSION),
-                            then=Sum(F("activity_amount")),
-                        ),
-                    ),
-                    activity_total=Case(
-                        When(
-                            Q(activity_type=ActivityType.POINT_CONVERSION),
-                            then=0 - (Sum(F("activity_amount"))),
-                        ),
-                        When(
-                            ~Q(activity_type=ActivityType.POINT_CONVERSION),
-                            then=Sum(F("activity_amount")),
-                        ),
-                    ),
-                    conversion_total=Case(
-                        When(
-                            Q(activity_type=ActivityType.POINT_CONVERSION),
-                            then=0 - (Sum(F("activity_amount"))),
-                        ),
-                    ),
-                )
-                .order_by("-activity_total")
-            )
-
-            remaining_points = activities.aggregate(
-                total=Coalesce(Sum("activity_total"), 0, output_field=DecimalField())
-            ).get("total")
+            remaining_points = get_wallet_balance(
+                WalletType.PV_WALLET, membership_level=membership_level, account__user=self.request.user.pk
+            ).get("balance")
 
             if remaining_points - int(amount) >= 0:
                 can_convert, minimum_conversion_amount = compute_minimum_conversion_amount(amount)
@@ -407,6 +303,7 @@ class UpdateSettingsView(views.APIView):
                 obj.save()
                 instances.append(obj)
 
+        transaction.on_commit(invalidate_settings_cache)
         serializer = SettingsSerializer(instances, many=True)
         if serializer:
             return Response(data={"detail": "System Settings Updated."}, status=status.HTTP_201_CREATED)
@@ -417,6 +314,18 @@ class UpdateSettingsView(views.APIView):
             )
 
 
+class GetCacheStatsView(views.APIView):
+    permission_classes = [IsDeveloperUser | IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        if hasattr(cache, "get_stats"):
+            return Response(data=cache.get_stats(), status=status.HTTP_200_OK)
+        return Response(
+            data={"detail": "Cache statistics unavailable."},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+
 class UpdateMembershipLevelsView(views.APIView):
     permission_classes = [IsDeveloperUser | IsAdminUser | IsStaffUser]
 
@@ -447,30 +356,26 @@ class GetWalletCanCashoutView(views.APIView):
     permission_classes = [IsDeveloperUser | IsAdminUser | IsStaffUser | IsMemberUser]
 
     def post(self, request, *args, **kwargs):
-        if get_wallet_can_cashout(request.data.get("wallet")):
-            no_cashout_today = not check_if_has_cashout_today(request)
-            if no_cashout_today:
-                has_no_pending_cashout = not check_if_has_pending_cashout(request)
-                if has_no_pending_cashout:
-                    return Response(
-                        data={"detail": "Cashout Available"},
-                        status=status.HTTP_200_OK,
-                    )
-                else:
-                    return Response(
-                        data={"detail": "Pending Cashout request existing for Wallet."},
-                        status=status.HTTP_403_FORBIDDEN,
-                    )
-            else:
-                return Response(
-                    data={"detail": "Max Cashout reached today."},
-                    status=status.HTTP_403_FORBIDDEN,
-                )
-        else:
+        eligibility = get_cashout_eligibility(request.user.pk, request.data.get("wallet"))
+        if not eligibility["is_open"]:
             return Response(
                 data={"detail": "Cashout currently unavailable."},
                 status=status.HTTP_403_FORBIDDEN,
             )
+        elif eligibility["has_cashout_today"]:
+            return Response(
+                data={"detail": "Max Cashout reached today."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        elif eligibility["has_pending_cashout"]:
+            return Response(
+                data={"detail": "Pending Cashout request existing for Wallet."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        return Response(
+            data={"detail": "Cashout Available"},
+            status=status.HTTP_200_OK,
+        )
 
 
 class GetWalletScheduleView(views.APIView):
@@ -496,39 +401,7 @@ class GetMaxWalletAmountView(views.APIView):
         wallet = request.data.get("wallet")
         amount = request.data.get("amount")
         if wallet is not None and amount is not None:
-            activities = (
-                Activity.objects.filter(account__user=self.request.user, wallet=wallet)
-                .values("activity_type")
-                .annotate(
-                    running_total=Case(
-                        When(
-                            ~Q(activity_type=ActivityType.CASHOUT),
-                            then=Sum(F("activity_amount")),
-                        ),
-                    ),
-                    activity_total=Case(
-                        When(
-                            Q(activity_type=ActivityType.CASHOUT),
-                            then=0 - (Sum(F("activity_amount"))),
-                        ),
-                        When(
-                            ~Q(activity_type=ActivityType.CASHOUT),
-                            then=Sum(F("activity_amount")),
-                        ),
-                    ),
-                    cashout_total=Case(
-                        When(
-                            Q(activity_type=ActivityType.CASHOUT),
-                            then=0 - (Sum(F("activity_amount"))),
-                        ),
-                    ),
-                )
-                .order_by("-activity_total")
-            )
-
-            wallet_total = activities.aggregate(
-                total=Coalesce(Sum("activity_total"), 0, output_field=DecimalField())
-            ).get("total")
+            wallet_total = get_wallet_balance(wallet, account__user=self.request.user).get("balance")
 
             if wallet_total - int(amount) >= 0:
                 can_cashout, minimum_cashout_amount = compute_minimum_cashout_amount(amount, wallet)
@@ -589,12 +462,19 @@ class GetWalletTotalFeeView(views.APIView):
 class RequestCashoutView(views.APIView):
     permission_classes = [IsDeveloperUser | IsAdminUser | IsStaffUser | IsMemberUser]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         processed_request = process_create_cashout_request(request)
         serializer = CreateUpdateActivitySerializer(data=processed_request)
 
         if serializer.is_valid():
-            created_cashout = serializer.save()
+            try:
+                created_cashout = serializer.save()
+            except InsufficientWalletBalance:
+                return Response(
+                    data={"detail": "Cashout exceeds Wallet Balance."},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
             if created_cashout:
                 return Response(data={"detail": "Cashout Request created."}, status=status.HTTP_201_CREATED)
             else:
@@ -0,0 +1,64 @@
+import logging
+import os
+import tempfile
+import time
+from django.core import serializers
+from django.core.management.base import BaseCommand
+from logs.handlers import QueuedRotatingFileHandler
+from logs.services import log_object
+from orders.models import Order
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Compare per call logging overhead of the inline serializer and file writes against the queued pipeline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+
+    def get_logger(self, name, handler, level):
+        log = logging.getLogger("benchmark_logging.%s" % (name))
+        log.handlers = [handler]
+        log.setLevel(level)
+        log.propagate = False
+        handler.setFormatter(logging.Formatter("{levelname} {asctime} {message}", style="{"))
+        return log
+
+    def run(self, log_call, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            log_call()
+        return (time.perf_counter() - start) * 1000000 / iterations
+
+    def handle(self, *args, **options):
+        obj = Order.objects.first() or User.objects.first()
+        if obj is None:
+            self.stdout.write(self.style.ERROR("No Order or User to log."))
+            return
+
+        iterations = options["iterations"]
+        with tempfile.TemporaryDirectory() as log_dir:
+            for level_name, level in (("enabled", logging.DEBUG), ("disabled", logging.WARNING)):
+                inline_handler = logging.FileHandler(os.path.join(log_dir, "inline_%s.log" % (level_name)))
+                inline_logger = self.get_logger("inline_%s" % (level_name), inline_handler, level)
+                queued_handler = QueuedRotatingFileHandler(
+                    os.path.join(log_dir, "queued_%s.log" % (level_name)), maxBytes=10 * 1024 * 1024, backupCount=1
+                )
+                queued_logger = self.get_logger("queued_%s" % (level_name), queued_handler, level)
+
+                inline_us = self.run(
+                    lambda: inline_logger.info("Created Order: " + serializers.serialize("json", [obj])), iterations
+                )
+                queued_us = self.run(lambda: log_object(queued_logger, logging.INFO, "Created Order", obj), iterations)
+
+                start = time.perf_counter()
+                queued_handler.close()
+                drain_ms = (time.perf_counter() - start) * 1000
+                inline_handler.close()
+
+                self.stdout.write(
+                    "INFO %s: inline %.1fus per call, queued %.1fus per call, background drain %.1fms for %s records"
+                    % (level_name, inline_us, queued_us, drain_ms, iterations)
+                )
+
+        self.stdout.write(self.style.SUCCESS("Logging benchmark complete."))
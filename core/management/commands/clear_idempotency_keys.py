@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core.services import clear_expired_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TIMEOUT"
+
+    def handle(self, *args, **options):
+        deleted = clear_expired_idempotency_keys()
+        self.stdout.write(self.style.SUCCESS("Deleted %s expired idempotency keys." % (deleted)))
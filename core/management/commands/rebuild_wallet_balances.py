@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core.services import rebuild_wallet_balances
+
+
+class Command(BaseCommand):
+    help = "Recompute the wallet balance table from the Activity ledger"
+
+    def handle(self, *args, **options):
+        wallet_balances = rebuild_wallet_balances()
+        self.stdout.write(self.style.SUCCESS("Rebuilt %s wallet balances." % (len(wallet_balances))))
@@ -0,0 +1,96 @@
+import decimal
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from core.enums import ActivityStatus, ActivityType, WalletType
+from core.models import Activity, WalletBalance
+from core.services import InsufficientWalletBalance, debit_wallet, rebuild_wallet_balances
+
+
+class Command(BaseCommand):
+    help = "Run concurrent cashout debits against one Account wallet and verify the balance never overdraws"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--account-id", type=int, required=True)
+        parser.add_argument("--wallet", default=WalletType.M_WALLET)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=25)
+        parser.add_argument("--amount", type=decimal.Decimal, default=None)
+
+    def handle(self, *args, **options):
+        account_id = options["account_id"]
+        wallet = options["wallet"]
+        wallet_balance = WalletBalance.objects.filter(
+            account_id=account_id, wallet=wallet, membership_level__isnull=True
+        ).first()
+        if wallet_balance is None or wallet_balance.balance <= 0:
+            raise CommandError("Account %s has no %s balance to debit." % (account_id, wallet))
+
+        starting_balance = wallet_balance.balance
+        total_requests = options["workers"] * options["requests"]
+        amount = options["amount"] or max((starting_balance * 2 / total_requests).quantize(decimal.Decimal("0.01")), 1)
+        results = {"debited": [], "insufficient": 0, "errors": 0}
+        results_lock = threading.Lock()
+
+        def worker():
+            try:
+                for _ in range(options["requests"]):
+                    try:
+                        activities = debit_wallet(
+                            account_id,
+                            wallet,
+                            [
+                                Activity(
+                                    account_id=account_id,
+                                    activity_type=ActivityType.CASHOUT,
+                                    activity_amount=amount,
+                                    status=ActivityStatus.REQUESTED,
+                                    wallet=wallet,
+                                    note="stress_wallet_debits",
+                                )
+                            ],
+                        )
+                        with results_lock:
+                            results["debited"].append(activities[0].pk)
+                    except InsufficientWalletBalance:
+                        with results_lock:
+                            results["insufficient"] += 1
+                    except Exception:
+                        with results_lock:
+                            results["errors"] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options["workers"])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        wallet_balance.refresh_from_db()
+        debited = len(results["debited"])
+        expected_balance = starting_balance - amount * debited
+        self.stdout.write(
+            "%s requests of %s in %.2fs (%.1f/s): %s debited, %s insufficient, %s errors, balance %s -> %s"
+            % (
+                total_requests,
+                amount,
+                elapsed,
+                total_requests / elapsed,
+                debited,
+                results["insufficient"],
+                results["errors"],
+                starting_balance,
+                wallet_balance.balance,
+            )
+        )
+
+        Activity.objects.filter(pk__in=[pk for pk in results["debited"] if pk]).delete()
+        rebuild_wallet_balances()
+
+        if wallet_balance.balance < 0 or wallet_balance.balance != expected_balance:
+            raise CommandError("Wallet overdrawn or out of sync, expected balance %s." % (expected_balance))
+        self.stdout.write(self.style.SUCCESS("No overdraft, stress activities removed and balances rebuilt."))
@@ -1,4 +1,6 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Q
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from simple_history.models import HistoricalRecords
@@ -99,6 +101,9 @@ class Activity(models.Model):
     class Meta:
         verbose_name_plural = "Activities"
         ordering = ["-created", "-id"]
+        indexes = [
+            models.Index(fields=("account", "activity_type", "wallet", "status", "modified")),
+        ]
 
     def __str__(self):
         return "%s : %s : %s - %s" % (self.activity_type, self.wallet, self.activity_amount, self.account)
@@ -108,15 +113,14 @@ class Activity(models.Model):
 
     def get_activity_summary(self):
         detail = []
-        if self.content_type:
-            generic_object = self.content_type.model_class().objects.get(id=self.object_id)
+        if self.content_type_id:
             match self.activity_type:
                 case ActivityType.PURCHASE:
-                    detail = "Referral Link Usage on Order #%s" % (str(generic_object.pk).zfill(5))
+                    detail = "Referral Link Usage on Order #%s" % (str(self.object_id).zfill(5))
                 case ActivityType.PAYOUT:
-                    detail = "Payout to Cashout %s" % (str(generic_object.pk).zfill(5))
+                    detail = "Payout to Cashout %s" % (str(self.object_id).zfill(5))
                 case ActivityType.REFERRAL_LINK_USAGE:
-                    detail = "Referral Link Usage on Order #%s" % (str(generic_object.pk).zfill(5))
+                    detail = "Referral Link Usage on Order #%s" % (str(self.object_id).zfill(5))
                 case ActivityType.CASHOUT:
                     detail = "Cashout"
         else:
@@ -133,6 +137,41 @@ class Activity(models.Model):
         return str(self.id).zfill(5)
 
 
+class WalletBalance(models.Model):
+    account = models.ForeignKey(
+        "accounts.Account",
+        on_delete=models.CASCADE,
+        related_name="wallet_balances",
+    )
+    wallet = models.CharField(max_length=32, choices=WalletType.choices)
+    membership_level = models.ForeignKey(
+        "core.MembershipLevel",
+        on_delete=models.CASCADE,
+        related_name="wallet_balances",
+        null=True,
+        blank=True,
+    )
+    balance = models.DecimalField(default=0, decimal_places=2, max_digits=13)
+    cashout_total = models.DecimalField(default=0, decimal_places=2, max_digits=13)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("account", "wallet", "membership_level"),
+                name="one_balance_per_account_wallet_membership_level",
+            ),
+            models.UniqueConstraint(
+                fields=("account", "wallet"),
+                condition=Q(membership_level__isnull=True),
+                name="one_balance_per_account_wallet",
+            ),
+        ]
+
+    def __str__(self):
+        return "%s : %s : %s - %s" % (self.wallet, self.membership_level, self.balance, self.account)
+
+
 class ActivityDetails(models.Model):
     activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name="details")
     action = models.CharField(
@@ -179,3 +218,23 @@ class CashoutMethods(models.Model):
 
     def __str__(self):
         return "%s - %s" % (self.method_name, self.is_disabled)
+
+
+class IdempotencyKey(models.Model):
+    scope = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_data = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("scope", "key"), name="one_idempotency_key_per_scope"),
+        ]
+        indexes = [
+            models.Index(fields=("created",)),
+        ]
+
+    def __str__(self):
+        return "%s : %s - %s" % (self.scope, self.key, self.status_code)
@@ -1,11 +1,28 @@
+from django.db import models, transaction
 from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
 from accounts.models import CashoutMethod
+from core.enums import ActivityType
 from core.models import Setting, MembershipLevel, Activity, ActivityDetails, CashoutMethods
-from core.services import get_cashout_processing_fee_percentage
+from core.services import (
+    create_activities,
+    debit_wallet,
+    get_cashout_processing_fee_percentage,
+    invalidate_settings_cache,
+    prefetch_content_objects,
+    update_wallet_balance_on_status_change,
+)
 from orders.models import Order
 
 
+class ActivityListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        activities = list(data.all() if isinstance(data, models.Manager) else data)
+        prefetch_content_objects(activities, {"cashoutmethod": ("method",)})
+
+        return super(ActivityListSerializer, self).to_representation(activities)
+
+
 class ContentTypeOrderInfoSerializer(ModelSerializer):
     order_number = serializers.CharField(source="get_order_number", required=False)
 
@@ -57,6 +74,7 @@ class SettingsSerializer(ModelSerializer):
     def update(self, instance, validated_data):
         instance.value = validated_data.get("value", instance.value)
         instance.save()
+        transaction.on_commit(invalidate_settings_cache)
 
         return instance
 
@@ -122,24 +140,32 @@ class CreateUpdateActivitySerializer(ModelSerializer):
 
     def create(self, validated_data):
         details = validated_data.pop("details")
-        activity = Activity.objects.create(**validated_data)
+        with transaction.atomic():
+            activity = Activity(**validated_data)
+            if activity.activity_type == ActivityType.CASHOUT and activity.account_id:
+                debit_wallet(activity.account_id, activity.wallet, [activity])
+            else:
+                create_activities([activity])
 
-        for detail in details:
-            ActivityDetails.objects.create(**detail, activity=activity)
+            for detail in details:
+                ActivityDetails.objects.create(**detail, activity=activity)
 
         return activity
 
     def update(self, instance, validated_data):
         details = validated_data.get("details")
+        previous_status = instance.status
 
         instance.status = validated_data.get("status", instance.status)
         instance.is_deleted = validated_data.get("is_deleted", instance.is_deleted)
         instance.note = validated_data.get("note", instance.note)
-        instance.save()
+        with transaction.atomic():
+            instance.save()
+            update_wallet_balance_on_status_change(instance, previous_status)
 
-        if details:
-            for detail in details:
-                ActivityDetails.objects.create(**detail, activity=instance)
+            if details:
+                for detail in details:
+                    ActivityDetails.objects.create(**detail, activity=instance)
 
         return instance
 
@@ -160,6 +186,7 @@ class ActivitiesSerializer(ModelSerializer):
 
     class Meta:
         model = Activity
+        list_serializer_class = ActivityListSerializer
         fields = [
             "details",
             "activity_summary",
@@ -260,6 +287,7 @@ class ActivityCashoutInfoSerializer(ModelSerializer):
 
     class Meta:
         model = Activity
+        list_serializer_class = ActivityListSerializer
         fields = [
             "activity_number",
             "wallet",
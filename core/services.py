@@ -1,15 +1,23 @@
 import calendar
+import datetime
 import decimal
-from tzlocal import get_localzone
+import time
+import uuid
+from collections import defaultdict
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q, Sum, Case, When, F, DecimalField
-from django.db.models.functions import TruncDate, Coalesce
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Sum, Count, Case, When, F, DecimalField, Prefetch, prefetch_related_objects
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from accounts.models import Account
 from products.models import PointValue
 from core.enums import Settings, WalletType, ActivityStatus, ActivityType
-from core.models import Activity, MembershipLevel, Setting
+from core.models import Activity, IdempotencyKey, MembershipLevel, Setting, WalletBalance
+from logs.services import create_log
+from orders.models import Order, OrderDetail, OrderReferralEarning
 
 
 def get_object_or_none(classmodel, **kwargs):
@@ -19,12 +27,77 @@ def get_object_or_none(classmodel, **kwargs):
         return None
 
 
+def prefetch_content_objects(objects, select_related=None):
+    select_related = select_related or {}
+    object_ids = defaultdict(set)
+    for obj in objects:
+        if obj.content_type_id and obj.object_id:
+            object_ids[obj.content_type_id].add(obj.object_id)
+
+    content_types = {}
+    content_objects = {}
+    for content_type_id, ids in object_ids.items():
+        content_type = ContentType.objects.get_for_id(content_type_id)
+        queryset = content_type.model_class()._base_manager.filter(pk__in=ids)
+        if content_type.model in select_related:
+            queryset = queryset.select_related(*select_related[content_type.model])
+        content_types[content_type_id] = content_type
+        content_objects[content_type_id] = queryset.in_bulk()
+
+    for obj in objects:
+        content_type_field = obj._meta.get_field("content_type")
+        content_object_field = obj._meta.get_field("content_object")
+        if obj.content_type_id in content_types:
+            content_type_field.set_cached_value(obj, content_types[obj.content_type_id])
+            content_object_field.set_cached_value(obj, content_objects[obj.content_type_id].get(obj.object_id))
+
+    return objects
+
+
 def get_settings():
     return Setting.objects.all()
 
 
+SETTINGS_CACHE_VERSION_KEY = "core_settings_version"
+
+settings_cache = {"values": None, "version": None, "checked": 0}
+
+
+def get_cached_settings():
+    now = time.monotonic()
+    if settings_cache["values"] is None or now - settings_cache["checked"] >= settings.SETTINGS_CACHE_CHECK_INTERVAL:
+        version = cache.get(SETTINGS_CACHE_VERSION_KEY)
+        if settings_cache["values"] is None or version != settings_cache["version"]:
+            settings_cache["values"] = dict(Setting.objects.values_list("property", "value"))
+            settings_cache["version"] = version
+        settings_cache["checked"] = now
+
+    return settings_cache["values"]
+
+
+def invalidate_settings_cache():
+    cache.set(SETTINGS_CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+    settings_cache["values"] = None
+
+
 def get_setting(property):
-    return Setting.objects.get(property=property).value
+    values = get_cached_settings()
+    if property not in values:
+        raise Setting.DoesNotExist("Setting %s does not exist." % (property))
+
+    return values[property]
+
+
+def get_int_setting(property):
+    return int(get_setting(property))
+
+
+def get_decimal_setting(property):
+    return decimal.Decimal(get_setting(property))
+
+
+def get_bool_setting(property):
+    return bool(int(get_setting(property)))
 
 
 def create_activity(
@@ -39,8 +112,8 @@ def create_activity(
     object_id=None,
     user=None,
 ):
-    if user.is_authenticated:
-        return Activity.objects.create(
+    with transaction.atomic():
+        activity = Activity.objects.create(
             account=account,
             activity_type=activity_type,
             activity_amount=activity_amount,
@@ -50,106 +123,238 @@ def create_activity(
             product_variant=product_variant,
             content_type=content_type,
             object_id=object_id,
-            created_by=user,
+            created_by=user if user.is_authenticated else None,
         )
-    else:
-        return Activity.objects.create(
-            account=account,
-            activity_type=activity_type,
-            activity_amount=activity_amount,
-            status=status,
-            wallet=wallet,
-            membership_level=membership_level,
-            product_variant=product_variant,
-            content_type=content_type,
-            object_id=object_id,
+        update_wallet_balances([activity])
+
+        return activity
+
+
+def get_activity_balance_change(activity_type, activity_amount, status):
+    amount = activity_amount or 0
+    if activity_type == ActivityType.CASHOUT:
+        if status == ActivityStatus.DENIED:
+            return 0, amount
+        return -amount, amount
+    return amount, 0
+
+
+def get_wallet_balance_key(activity):
+    return (activity.account_id, activity.wallet, activity.membership_level_id)
+
+
+def apply_wallet_balance_changes(changes):
+    for (account_id, wallet, membership_level_id), (balance, cashout_total) in changes.items():
+        if account_id is None or wallet is None or (not balance and not cashout_total):
+            continue
+
+        wallet_balance, created = WalletBalance.objects.get_or_create(
+            account_id=account_id, wallet=wallet, membership_level_id=membership_level_id
+        )
+        WalletBalance.objects.filter(pk=wallet_balance.pk).update(
+            balance=F("balance") + balance,
+            cashout_total=F("cashout_total") + cashout_total,
+            modified=timezone.now(),
+        )
+
+
+def update_wallet_balances(activities):
+    changes = {}
+    for activity in activities:
+        balance, cashout_total = get_activity_balance_change(
+            activity.activity_type, activity.activity_amount, activity.status
+        )
+        key = get_wallet_balance_key(activity)
+        current_balance, current_cashout_total = changes.get(key, (0, 0))
+        changes[key] = (current_balance + balance, current_cashout_total + cashout_total)
+
+    apply_wallet_balance_changes(changes)
+
+
+def update_wallet_balance_on_status_change(activity, previous_status):
+    if previous_status == activity.status:
+        return
+
+    previous_balance, previous_cashout_total = get_activity_balance_change(
+        activity.activity_type, activity.activity_amount, previous_status
+    )
+    balance, cashout_total = get_activity_balance_change(
+        activity.activity_type, activity.activity_amount, activity.status
+    )
+    apply_wallet_balance_changes(
+        {get_wallet_balance_key(activity): (balance - previous_balance, cashout_total - previous_cashout_total)}
+    )
+
+
+class InsufficientWalletBalance(Exception):
+    pass
+
+
+def create_activities(activities):
+    with transaction.atomic():
+        activities = Activity.objects.bulk_create(activities)
+        update_wallet_balances(activities)
+
+    return activities
+
+
+def lock_wallet_balances(account_id, wallet, membership_level_ids=None):
+    wallet_balances = WalletBalance.objects.select_for_update().filter(account_id=account_id, wallet=wallet)
+    if membership_level_ids is not None:
+        wallet_balances = wallet_balances.filter(membership_level_id__in=list(membership_level_ids))
+
+    return {wallet_balance.membership_level_id: wallet_balance for wallet_balance in wallet_balances.order_by("pk")}
+
+
+def debit_wallet(account_id, wallet, activities):
+    debits = defaultdict(decimal.Decimal)
+    for activity in activities:
+        debits[activity.membership_level_id] += abs(activity.activity_amount)
+
+    with transaction.atomic():
+        wallet_balances = lock_wallet_balances(account_id, wallet)
+        for membership_level_id, amount in debits.items():
+            wallet_balance = wallet_balances.get(membership_level_id)
+            if wallet_balance is None or wallet_balance.balance < amount:
+                raise InsufficientWalletBalance("Insufficient %s balance for Account %s." % (wallet, account_id))
+
+        return create_activities(activities)
+
+
+def get_wallet_balance(wallet, membership_level=None, **filters):
+    if membership_level is not None:
+        filters["membership_level"] = membership_level
+
+    return WalletBalance.objects.filter(wallet=wallet, **filters).aggregate(
+        balance=Coalesce(Sum("balance"), 0, output_field=DecimalField()),
+        cashout_total=Coalesce(Sum("cashout_total"), 0, output_field=DecimalField()),
+    )
+
+
+def get_membership_level_balances(**filters):
+    balance_filter = Q(**{"wallet_balances__%s" % (key): value for key, value in filters.items()})
+
+    return (
+        MembershipLevel.objects.annotate(
+            total=Coalesce(Sum("wallet_balances__balance", filter=balance_filter), 0, output_field=DecimalField())
+        )
+        .values("name", "total")
+        .order_by("id")
+    )
+
+
+def rebuild_wallet_balances():
+    ledger = (
+        Activity.objects.filter(account__isnull=False, wallet__isnull=False)
+        .values("account", "wallet", "membership_level")
+        .annotate(
+            balance=Coalesce(
+                Sum(
+                    Case(
+                        When(
+                            Q(activity_type=ActivityType.CASHOUT) & ~Q(status=ActivityStatus.DENIED),
+                            then=0 - F("activity_amount"),
+                        ),
+                        When(Q(activity_type=ActivityType.CASHOUT), then=0),
+                        default=F("activity_amount"),
+                        output_field=DecimalField(),
+                    )
+                ),
+                0,
+                output_field=DecimalField(),
+            ),
+            cashout_total=Coalesce(
+                Sum("activity_amount", filter=Q(activity_type=ActivityType.CASHOUT)), 0, output_field=DecimalField()
+            ),
+        )
+        .order_by()
+    )
+
+    with transaction.atomic():
+        WalletBalance.objects.all().delete()
+        return WalletBalance.objects.bulk_create(
+            [
+                WalletBalance(
+                    account_id=row["account"],
+                    wallet=row["wallet"],
+                    membership_level_id=row["membership_level"],
+                    balance=row["balance"],
+                    cashout_total=row["cashout_total"],
+                )
+                for row in ledger
+            ],
+            batch_size=1000,
         )
 
 
 def compute_minimum_conversion_amount(amount):
-    minimum_conversion_amount = int(get_setting(property=Settings.MINIMUM_CONVERSTION_AMOUNT))
+    minimum_conversion_amount = get_int_setting(Settings.MINIMUM_CONVERSTION_AMOUNT)
     if minimum_conversion_amount:
         return amount >= minimum_conversion_amount, minimum_conversion_amount
     return False, 0
 
 
 def compute_conversion_amount(amount):
-    conversion_rate = int(get_setting(property=Settings.POINT_CONVERSION_RATE))
+    conversion_rate = get_int_setting(Settings.POINT_CONVERSION_RATE)
     if conversion_rate:
         return amount * conversion_rate
     return 0
 
 
 def process_point_conversion(request):
-    total_converted_points = 0
     try:
+        account = Account.objects.get(account_id=request.data.get("account_id"), user=request.user.pk)
+        conversions = defaultdict(decimal.Decimal)
         for activity in request.data.get("activities"):
             current_points = decimal.Decimal(activity.get("current_points"))
-            membership_level = activity.get("membership_level")
-
-            remaining_points = (
-                Activity.objects.filter(account__user=request.user.pk)
-                .values("activity_type")
-                .annotate(
-                    activity_total=Case(
-                        When(
-                            Q(activity_type=ActivityType.POINT_CONVERSION) & Q(membership_level=membership_level),
-                            then=0 - (Sum(F("activity_amount"))),
-                        ),
-                        When(
-                            ~Q(activity_type=ActivityType.POINT_CONVERSION),
-                            then=Sum(F("activity_amount")),
-                        ),
-                    ),
+            can_convert, minimum_conversion_amount = compute_minimum_conversion_amount(current_points)
+            if can_convert:
+                conversions[int(activity.get("membership_level"))] += current_points
+
+        created_by = request.user if request.user.is_authenticated else None
+        with transaction.atomic():
+            wallet_balances = lock_wallet_balances(account.pk, WalletType.PV_WALLET, conversions.keys())
+            activities = []
+            total_converted_points = 0
+            for membership_level_id, current_points in conversions.items():
+                wallet_balance = wallet_balances.get(membership_level_id)
+                if wallet_balance is None or wallet_balance.balance - current_points <= 0:
+                    continue
+
+                converted_amount = compute_conversion_amount(current_points)
+                activities.append(
+                    Activity(
+                        account=account,
+                        activity_type=ActivityType.POINT_CONVERSION,
+                        activity_amount=-abs(current_points),
+                        status=ActivityStatus.DONE,
+                        wallet=WalletType.PV_WALLET,
+                        membership_level_id=membership_level_id,
+                        created_by=created_by,
+                    )
+                )
+                total_converted_points += converted_amount
+
+            if not activities:
+                return False
+
+            activities.append(
+                Activity(
+                    account=account,
+                    activity_type=ActivityType.POINT_CONVERSION,
+                    activity_amount=total_converted_points,
+                    status=ActivityStatus.DONE,
+                    wallet=WalletType.M_WALLET,
+                    created_by=created_by,
                 )
-                .aggregate(total=Coalesce(Sum("activity_total"), 0, output_field=DecimalField()))
-                .get("total")
             )
-
-            if remaining_points - current_points > 0:
-                can_convert, minimum_conversion_amount = compute_minimum_conversion_amount(current_points)
-                if can_convert:
-                    converted_amount = compute_conversion_amount(current_points)
-                    create_point_conversion_activity(
-                        request, converted_amount=converted_amount, membership_level_id=membership_level
-                    )
-                    total_converted_points += converted_amount
-        else:
-            create_currency_conversion_activity(request, total_converted_points=total_converted_points)
-            return True
+            create_activities(activities)
+        return True
     except Exception as e:
-        print(e)
+        create_log("ERROR", "Error Point Conversion", e)
         return False
 
 
-def create_point_conversion_activity(request, converted_amount, membership_level_id):
-    account = get_object_or_404(Account, account_id=request.data.get("account_id"))
-    membership_level_id = get_object_or_404(MembershipLevel, id=membership_level_id)
-
-    return create_activity(
-        account=account,
-        activity_type=ActivityType.POINT_CONVERSION,
-        activity_amount=-abs(converted_amount),
-        status=ActivityStatus.DONE,
-        wallet=WalletType.PV_WALLET,
-        membership_level=membership_level_id,
-        user=request.user,
-    )
-
-
-def create_currency_conversion_activity(request, total_converted_points):
-    account = get_object_or_404(Account, account_id=request.data.get("account_id"))
-
-    return create_activity(
-        account=account,
-        activity_type=ActivityType.POINT_CONVERSION,
-        activity_amount=total_converted_points,
-        status=ActivityStatus.DONE,
-        wallet=WalletType.M_WALLET,
-        user=request.user,
-    )
-
-
 def get_wallet_cashout_schedule():
     days = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
     calendar.setfirstweekday(calendar.SUNDAY)
@@ -159,7 +364,7 @@ def get_wallet_cashout_schedule():
     ]:
         property = "%s%s" % (wallet, "_CASHOUT_DAY")
         if property:
-            day = int(get_setting(property=property))
+            day = get_int_setting(property)
             data.append({wallet: " is open during %s" % days[day]})
     else:
         return data
@@ -169,44 +374,42 @@ def get_wallet_can_cashout(wallet):
     if wallet == WalletType.M_WALLET:
         property = "%s%s" % (wallet, "_CASHOUT_DAY")
         if property:
-            day = int(get_setting(property=property))
+            day = get_int_setting(property)
             if day == timezone.localtime().isoweekday():
                 return True
             else:
                 has_override = "%s%s" % (wallet, "_CASHOUT_OVERRIDE")
-                if bool(int(get_setting(property=has_override))):
+                if get_bool_setting(has_override):
                     return True
                 else:
                     return False
 
 
-def check_if_has_cashout_today(request):
-    wallet = request.data.get("wallet")
-    if wallet:
-        local_tz = get_localzone()
-        return Activity.objects.annotate(modified_local_tz=TruncDate("modified", tzinfo=local_tz)).filter(
-            account__user=request.user.pk,
-            activity_type=ActivityType.CASHOUT,
-            wallet=wallet,
-            modified_local_tz=timezone.localtime().date(),
-        )
-    return True
+def get_local_day_range(now=None):
+    start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + datetime.timedelta(days=1)
 
 
-def check_if_has_pending_cashout(request):
-    wallet = request.data.get("wallet")
-    if wallet:
-        return Activity.objects.filter(
-            Q(activity_type=ActivityType.CASHOUT)
-            & Q(Q(status=ActivityStatus.REQUESTED) | Q(status=ActivityStatus.APPROVED)),
-            account__user=request.user.pk,
-            wallet=wallet,
-        )
-    return True
+def get_cashout_eligibility(user, wallet):
+    eligibility = {"is_open": bool(wallet and get_wallet_can_cashout(wallet))}
+    if not eligibility["is_open"]:
+        return eligibility
+
+    day_start, day_end = get_local_day_range()
+    is_today = Q(modified__gte=day_start, modified__lt=day_end)
+    is_pending = Q(status__in=(ActivityStatus.REQUESTED, ActivityStatus.APPROVED))
+    counts = (
+        Activity.objects.filter(account__user=user, activity_type=ActivityType.CASHOUT, wallet=wallet)
+        .filter(is_today | is_pending)
+        .aggregate(cashouts_today=Count("id", filter=is_today), pending_cashouts=Count("id", filter=is_pending))
+    )
+    eligibility["has_cashout_today"] = counts["cashouts_today"] > 0
+    eligibility["has_pending_cashout"] = counts["pending_cashouts"] > 0
+    return eligibility
 
 
 def get_cashout_processing_fee_percentage():
-    cashout_processing_fee_percentage = decimal.Decimal(get_setting(Settings.CASHOUT_PROCESSING_FEE_PERCENTAGE))
+    cashout_processing_fee_percentage = get_decimal_setting(Settings.CASHOUT_PROCESSING_FEE_PERCENTAGE)
     return cashout_processing_fee_percentage
 
 
@@ -228,7 +431,7 @@ def compute_minimum_cashout_amount(amount, wallet):
         property = "%s%s" % (wallet, "_MINIMUM_CASHOUT_AMOUNT")
 
         if property:
-            minimum_cashout_amount = int(get_setting(property=property))
+            minimum_cashout_amount = get_int_setting(property)
             return amount >= minimum_cashout_amount, minimum_cashout_amount
     return False, 0
 
@@ -291,36 +494,14 @@ def process_update_cashout_status(request):
         return cashout, data
 
 
-def convert_point_value_queryset_to_map(point_values):
+def convert_point_values_to_map(point_values):
     data = {}
     for point_value in point_values:
-        data[point_value.membership_level.level] = {
-            "membership_level": point_value.membership_level,
-            "name": point_value.membership_level.name,
-            "level": point_value.membership_level.level,
-            "point_value": point_value.point_value,
-        }
+        data[point_value["level"]] = point_value
 
     return data
 
 
-def create_referral_link_usage_activity(request, order, account, point_value, membership_level, product_variant):
-    content_type = ContentType.objects.get(model="order")
-
-    return create_activity(
-        account=account,
-        activity_type=ActivityType.REFERRAL_LINK_USAGE,
-        activity_amount=point_value,
-        status=ActivityStatus.DONE,
-        wallet=WalletType.PV_WALLET,
-        membership_level=membership_level,
-        product_variant=product_variant,
-        content_type=content_type,
-        object_id=order.pk,
-        user=request.user,
-    )
-
-
 def create_purchase_activity(request, order):
     content_type = ContentType.objects.get(model="order")
     if order.account:
@@ -380,20 +561,190 @@ def create_company_earning_activity(request, updated_cashout):
         )
 
 
-def comp_plan(request, order):
-    four_level_referrers = order.promo_code.account.get_four_level_referrers()
+def get_orders_point_values(orders):
+    details = list(
+        OrderDetail.objects.filter(
+            Q(product_variant__isnull=False) | Q(pricing_snapshot__isnull=False), order__in=orders
+        ).order_by("pk")
+    )
+    prefetch_related_objects(
+        [detail for detail in details if detail.pricing_snapshot is None],
+        Prefetch("product_variant__point_values", queryset=PointValue.objects.select_related("membership_level")),
+    )
+
+    orders_point_values = defaultdict(list)
+    for detail in details:
+        orders_point_values[detail.order_id].append((detail, convert_point_values_to_map(detail.get_point_values())))
+    return orders_point_values
+
+
+def get_order_point_values(order):
+    return get_orders_point_values([order])[order.pk]
+
+
+def get_comp_plan_activities(order, four_level_referrers, order_point_values, content_type, created_by, fold_quantity):
+    activities = []
     for referrer in four_level_referrers:
         level = referrer["level"]
         account = referrer["account"]
-        for detail in order.details.all():
-            quantity = detail.quantity
-            point_values = convert_point_value_queryset_to_map(detail.product_variant.point_values.all())
-            for _ in range(quantity):
-                create_referral_link_usage_activity(
-                    request,
-                    order,
-                    account,
-                    point_values[level]["point_value"],
-                    point_values[level]["membership_level"],
-                    detail.product_variant,
+        for detail, point_values in order_point_values:
+            if level not in point_values:
+                continue
+
+            if fold_quantity:
+                amounts = [point_values[level]["point_value"] * detail.quantity]
+            else:
+                amounts = [point_values[level]["point_value"]] * detail.quantity
+
+            for amount in amounts:
+                activities.append(
+                    Activity(
+                        account=account,
+                        activity_type=ActivityType.REFERRAL_LINK_USAGE,
+                        activity_amount=amount,
+                        status=ActivityStatus.DONE,
+                        wallet=WalletType.PV_WALLET,
+                        membership_level_id=point_values[level]["membership_level_id"],
+                        product_variant_id=detail.product_variant_id,
+                        content_type=content_type,
+                        object_id=order.pk,
+                        created_by=created_by,
+                    )
                 )
+
+    return activities
+
+
+def comp_plan(request, order, fold_quantity=None):
+    if fold_quantity is None:
+        fold_quantity = settings.COMP_PLAN_FOLD_QUANTITY
+
+    four_level_referrers = order.promo_code.account.get_four_level_referrers()
+    order_point_values = get_order_point_values(order)
+    activities = get_comp_plan_activities(
+        order,
+        four_level_referrers,
+        order_point_values,
+        ContentType.objects.get_for_model(order),
+        request.user if request.user.is_authenticated else None,
+        fold_quantity,
+    )
+
+    with transaction.atomic():
+        Activity.objects.bulk_create(activities, batch_size=1000)
+        update_wallet_balances(activities)
+        record_order_referral_earnings(order, four_level_referrers, order_point_values)
+
+    return activities
+
+
+def comp_plan_orders(request, orders, fold_quantity=None):
+    if fold_quantity is None:
+        fold_quantity = settings.COMP_PLAN_FOLD_QUANTITY
+
+    orders = [order for order in orders if order.promo_code and order.promo_code.account]
+    if not orders:
+        return []
+
+    orders_point_values = get_orders_point_values(orders)
+    content_type = ContentType.objects.get_for_model(Order)
+    created_by = request.user if request.user.is_authenticated else None
+
+    referrers = {}
+    activities = []
+    earnings = []
+    for order in orders:
+        account = order.promo_code.account
+        if account.pk not in referrers:
+            referrers[account.pk] = account.get_four_level_referrers()
+
+        order_point_values = orders_point_values[order.pk]
+        activities.extend(
+            get_comp_plan_activities(
+                order, referrers[account.pk], order_point_values, content_type, created_by, fold_quantity
+            )
+        )
+        earnings.extend(get_order_referral_earnings(order, referrers[account.pk], order_point_values))
+
+    with transaction.atomic():
+        Activity.objects.bulk_create(activities, batch_size=1000)
+        update_wallet_balances(activities)
+        OrderReferralEarning.objects.filter(order__in=orders).delete()
+        OrderReferralEarning.objects.bulk_create(earnings, batch_size=1000)
+
+    return activities
+
+
+def get_order_referral_earnings(order, four_level_referrers, order_point_values):
+    earnings = []
+    for referrer in four_level_referrers:
+        level = referrer["level"]
+        earning = OrderReferralEarning(order=order, account=referrer["account"], level=level, point_total=0)
+        for detail, point_values in order_point_values:
+            if level not in point_values:
+                continue
+
+            earning.point_total += point_values[level]["point_value"] * detail.quantity
+            earning.membership_level_id = point_values[level]["membership_level_id"]
+        earnings.append(earning)
+
+    return earnings
+
+
+def record_order_referral_earnings(order, four_level_referrers=None, order_point_values=None):
+    if not order.promo_code or not order.promo_code.account:
+        return []
+
+    if four_level_referrers is None:
+        four_level_referrers = order.promo_code.account.get_four_level_referrers()
+    if order_point_values is None:
+        order_point_values = get_order_point_values(order)
+
+    earnings = get_order_referral_earnings(order, four_level_referrers, order_point_values)
+    with transaction.atomic():
+        OrderReferralEarning.objects.filter(order=order).delete()
+        OrderReferralEarning.objects.bulk_create(earnings)
+
+    return earnings
+
+
+def rebuild_order_referral_earnings():
+    orders = Order.objects.filter(promo_code__account__isnull=False).select_related("promo_code__account")
+    earnings = 0
+    for order in orders.iterator():
+        earnings += len(record_order_referral_earnings(order))
+
+    return earnings
+
+
+def get_idempotency_key_expiry():
+    return timezone.now() - datetime.timedelta(seconds=settings.IDEMPOTENCY_KEY_TIMEOUT)
+
+
+def get_idempotency_key_lease_expiry():
+    return timezone.now() - datetime.timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE)
+
+
+def claim_idempotency_key(scope, key, request_fingerprint):
+    IdempotencyKey.objects.filter(
+        Q(created__lt=get_idempotency_key_expiry())
+        | Q(status_code__isnull=True, created__lt=get_idempotency_key_lease_expiry()),
+        scope=scope,
+        key=key,
+    ).delete()
+    try:
+        with transaction.atomic():
+            return (
+                IdempotencyKey.objects.create(scope=scope, key=key, request_fingerprint=request_fingerprint),
+                True,
+            )
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(scope=scope, key=key).first(), False
+
+
+def complete_idempotency_key(idempotency_key, status_code, response_data):
+    IdempotencyKey.objects.filter(pk=idempotency_key.pk).update(status_code=status_code, response_data=response_data)
+
+
+def clear_expired_idempotency_keys():
+    return IdempotencyKey.objects.filter(created__lt=get_idempotency_key_expiry()).delete()[0]
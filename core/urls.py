@@ -16,6 +16,7 @@ from core.api import (
     GetMaxPointConversionAmountView,
     CreateConversionView,
     UpdateSettingsView,
+    GetCacheStatsView,
     UpdateMembershipLevelsView,
     CashoutMethodsListViewSet,
     GetWalletCanCashoutView,
@@ -47,6 +48,7 @@ urlpatterns = [
     path("admin/updatemembershiplevels/", UpdateMembershipLevelsView.as_view()),
     path("admin/updatecashoutstatus/", UpdateCashoutStatusView.as_view()),
     path("admin/getmembershiplevelpoints/", GetMembershipLevelPointsAdminView.as_view()),
+    path("admin/getcachestats/", GetCacheStatsView.as_view()),
     # Member
     path("member/getmembershiplevelpoints/", GetMembershipLevelPointsMemberView.as_view()),
     path("member/getconversionrate/", GetPointConversionRateView.as_view()),
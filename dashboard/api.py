@@ -1,4 +1,4 @@
-from django.db.models import Q, Max, F, Sum
+from django.db.models import Q
 from rest_framework import status, views
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
@@ -7,14 +7,16 @@ from dashboard.serializers import OrdersListSerializer, ProductVariantsListSeria
 from dashboard.services import (
     get_obj_count,
     get_obj_count_group_by,
-    get_obj_total,
+    get_obj_totals,
     get_obj_total_group_by,
     get_obj_aggregate_count,
     get_obj_aggregate_total,
+    get_obj_aggregate_totals,
 )
 from orders.enums import OrderStatus
-from orders.models import Order, Customer
+from orders.models import Order, OrderDetail, Customer
 from products.models import ProductVariant
+from products.services import annotate_branch_stock
 from vanguard.permissions import IsDeveloperUser, IsAdminUser, IsStaffUser
 
 
@@ -28,16 +30,8 @@ class PendingOrdersListAdminViewSet(ModelViewSet):
         branch_id = self.request.query_params.get("branch_id", None)
         if branch_id:
             return (
-                Order.objects.filter(branch__branch_id=branch_id)
-                .annotate(latest_supply_status=Max("histories__created"))
-                .filter(
-                    Q(histories__created=F("latest_supply_status"))
-                    & ~Q(
-                        Q(histories__order_status=OrderStatus.COMPLETED)
-                        | Q(histories__order_status=OrderStatus.CANCELLED)
-                        | Q(histories__order_status=OrderStatus.REFUNDED)
-                    )
-                )
+                Order.objects.filter(branch__branch_id=branch_id, current_status__isnull=False)
+                .exclude(current_status__in=(OrderStatus.COMPLETED, OrderStatus.CANCELLED, OrderStatus.REFUNDED))
                 .order_by("-id")
             )
 
@@ -50,7 +44,7 @@ class ProductVariantStocksListAdminViewSet(ModelViewSet):
 
     def get_queryset(self):
         branch_id = self.request.query_params.get("branch_id", None)
-        return ProductVariant.objects.all().order_by("product")
+        return annotate_branch_stock(ProductVariant.objects.all(), branch_id).order_by("product")
 
 
 class OrdersCountSummaryView(views.APIView):
@@ -82,8 +76,9 @@ class OrdersSalesSummaryView(views.APIView):
             orders = Order.objects.filter(
                 Q(branch__branch_id=branch_id) & Q(histories__order_status=OrderStatus.COMPLETED)
             )
-            total_amount = get_obj_total(orders, period, "total_amount", "order_date")
-            total_discount = get_obj_total(orders, period, "total_discount", "order_date")
+            total_amount, total_discount = get_obj_totals(
+                orders, period, ["total_amount", "total_discount"], "order_date"
+            )
             return Response(
                 data={
                     "total_amount": total_amount,
@@ -104,13 +99,18 @@ class TotalSalesSummaryView(views.APIView):
         branch_id = request.data.get("branch_id")
         period = request.data.get("period")
         if branch_id and period:
-            data = []
             orders = Order.objects.filter(Q(branch__branch_id=branch_id))
-            total_amount = get_obj_aggregate_total(orders, period, "total_amount", "order_date", "Total Amount")
-            total_discount = get_obj_aggregate_total(orders, period, "total_discount", "order_date", "Total Discount")
-            total_fees = get_obj_aggregate_total(orders, period, "total_fees", "order_date", "Total Fees")
-            order_amount = get_obj_aggregate_total(orders, period, "order_amount", "order_date", "Order Amount")
-            data.append((total_discount, total_fees, order_amount))
+            total_amount, total_discount, total_fees, order_amount = get_obj_aggregate_totals(
+                orders,
+                period,
+                [
+                    ("total_amount", "Total Amount"),
+                    ("total_discount", "Total Discount"),
+                    ("total_fees", "Total Fees"),
+                    ("order_amount", "Order Amount"),
+                ],
+                "order_date",
+            )
 
             return Response(
                 data={"data": (total_discount, total_fees, order_amount), "total": total_amount},
@@ -226,18 +226,13 @@ class ProductVariantQuantitySoldView(views.APIView):
         branch_id = request.data.get("branch_id")
         period = request.data.get("period")
         if branch_id and period:
-            product_variants = ProductVariant.objects.annotate(
-                quantity=Sum(
-                    "orders__quantity",
-                    filter=Q(
-                        Q(orders__order__branch__branch_id=branch_id)
-                        & Q(orders__order__histories__order_status=OrderStatus.COMPLETED)
-                    ),
-                )
-            ).all()
+            order_details = OrderDetail.objects.filter(
+                order__branch__branch_id=branch_id,
+                order__in=Order.objects.filter(histories__order_status=OrderStatus.COMPLETED),
+            )
 
             serialized_data = get_obj_total_group_by(
-                product_variants, period, "sku", "quantity", "orders__order__order_date"
+                order_details, period, "product_variant__sku", "quantity", "order__order_date"
             )
             return Response(
                 data=serialized_data,
@@ -256,18 +251,13 @@ class ProductVariantOrdersTotalSalesView(views.APIView):
         branch_id = request.data.get("branch_id")
         period = request.data.get("period")
         if branch_id and period:
-            product_variants = ProductVariant.objects.annotate(
-                total_amount=Sum(
-                    "orders__total_amount",
-                    filter=Q(
-                        Q(orders__order__branch__branch_id=branch_id)
-                        & Q(orders__order__histories__order_status=OrderStatus.COMPLETED)
-                    ),
-                )
-            ).all()
+            order_details = OrderDetail.objects.filter(
+                order__branch__branch_id=branch_id,
+                order__in=Order.objects.filter(histories__order_status=OrderStatus.COMPLETED),
+            )
 
             serialized_data = get_obj_total_group_by(
-                product_variants, period, "sku", "total_amount", "orders__order__order_date"
+                order_details, period, "product_variant__sku", "total_amount", "order__order_date"
             )
             return Response(
                 data=serialized_data,
@@ -286,12 +276,8 @@ class OrdersStatusView(views.APIView):
         branch_id = request.data.get("branch_id")
         period = request.data.get("period")
         if branch_id and period:
-            orders = (
-                Order.objects.annotate(last_order_history_date=Max("histories__created"))
-                .filter(Q(branch__branch_id=branch_id) & Q(histories__created=F("last_order_history_date")))
-                .annotate(current_order_status=F("histories__order_status"))
-            )
-            serialized_data = get_obj_count_group_by(orders, period, "current_order_status", "id", "order_date")
+            orders = Order.objects.filter(branch__branch_id=branch_id)
+            serialized_data = get_obj_count_group_by(orders, period, "current_status", "id", "order_date")
             return Response(
                 data=serialized_data,
                 status=status.HTTP_200_OK,
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 from core.enums import Settings
-from core.services import get_setting
+from core.services import get_int_setting
 from orders.models import Order, Customer
 from products.models import ProductVariant
 
@@ -30,7 +30,7 @@ class ProductVariantsListSerializer(ModelSerializer):
     def to_representation(self, instance):
         request = self.context["request"]
         branch_id = request.query_params["branch_id"]
-        low_stock_alert_quantity = int(get_setting(Settings.LOW_STOCK_ALERT_QUANTITY))
+        low_stock_alert_quantity = get_int_setting(Settings.LOW_STOCK_ALERT_QUANTITY)
         stocks = instance.get_total_quantity_by_branch(branch_id=branch_id)
         stocks_status = None
         if stocks > low_stock_alert_quantity:
@@ -1,332 +1,207 @@
 import datetime
+import decimal
 from dateutil.relativedelta import relativedelta
-from django.db.models.functions import TruncMonth, TruncDate, TruncYear, Coalesce
-from django.db.models import Q, Max, Min, F, Count, Sum, When, Case, DecimalField, IntegerField
+from django.db.models.functions import Trunc, Coalesce
+from django.db.models import Max, Min, F, Count, Sum, When, Case, DateField, DecimalField, IntegerField
+from django.utils import timezone
 from accounts.models import Account
 from orders.enums import OrderStatus
 from orders.models import Order, Customer
 
 
-def get_obj_count(obj, period, param, filter):
-    data = []
+def get_period_buckets(period, period_length):
+    today = timezone.localdate()
     match period:
         case "Day":
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__date")
-            for x in reversed(range(7)):
-                date_filter = today - relativedelta(days=x)
-                filters[property_filter] = date_filter
-                total = obj.aggregate(
-                    total=Coalesce(Count(param, filter=Q(**filters)), 0, output_field=IntegerField())
-                ).get("total")
-                data.append({"period": date_filter, "total": total})
-            return data
+            return [today - relativedelta(days=x) for x in reversed(range(period_length))]
         case "Month":
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__month")
-            for x in reversed(range(6)):
-                date_filter = today - relativedelta(months=x)
-                filters[property_filter] = date_filter.month
-                total = obj.aggregate(
-                    total=Coalesce(
-                        Count(param, filter=Q(**filters)),
-                        0,
-                        output_field=IntegerField(),
-                    )
-                ).get("total")
-                data.append(
-                    {"period": "-".join((str(date_filter.year), "{:02d}".format(date_filter.month))), "total": total}
-                )
-            return data
+            return [today.replace(day=1) - relativedelta(months=x) for x in reversed(range(period_length))]
         case "Year":
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__year")
-            for x in reversed(range(3)):
-                date_filter = today - relativedelta(years=x)
-                filters[property_filter] = date_filter.year
-                total = obj.aggregate(
-                    total=Coalesce(
-                        Count(param, filter=Q(**filters)),
-                        0,
-                        output_field=IntegerField(),
-                    )
-                ).get("total")
-                data.append({"period": str(date_filter.year), "total": total})
-            return data
+            return [today.replace(month=1, day=1) - relativedelta(years=x) for x in reversed(range(period_length))]
         case _:
             return []
 
 
-def get_obj_total(obj, period, param, filter):
-    data = []
+def get_period_range(period, buckets):
     match period:
         case "Day":
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__date")
-            for x in reversed(range(7)):
-                date_filter = today - relativedelta(days=x)
-                filters[property_filter] = date_filter
-                total = obj.aggregate(
-                    total=Coalesce(Sum(param, filter=Q(**filters)), 0, output_field=DecimalField())
-                ).get("total")
-                data.append({"period": date_filter, "total": total})
-            return data
+            end = buckets[-1] + relativedelta(days=1)
         case "Month":
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__month")
-            for x in reversed(range(6)):
-                date_filter = today - relativedelta(months=x)
-                filters[property_filter] = date_filter.month
-                total = obj.aggregate(
-                    total=Coalesce(
-                        Sum(param, filter=Q(**filters)),
-                        0,
-                        output_field=DecimalField(),
-                    )
-                ).get("total")
-                data.append(
-                    {"period": "-".join((str(date_filter.year), "{:02d}".format(date_filter.month))), "total": total}
-                )
-            return data
+            end = buckets[-1] + relativedelta(months=1)
         case "Year":
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__year")
-            for x in reversed(range(3)):
-                date_filter = today - relativedelta(years=x)
-                filters[property_filter] = date_filter.year
-                total = obj.aggregate(
-                    total=Coalesce(
-                        Sum(param, filter=Q(**filters)),
-                        0,
-                        output_field=DecimalField(),
-                    )
-                ).get("total")
-                data.append({"period": str(date_filter.year), "total": total})
-            return data
-        case _:
-            return []
+            end = buckets[-1] + relativedelta(years=1)
 
+    local_tz = timezone.get_current_timezone()
+    return (
+        datetime.datetime.combine(buckets[0], datetime.time.min, tzinfo=local_tz),
+        datetime.datetime.combine(end, datetime.time.min, tzinfo=local_tz),
+    )
 
-def get_obj_count_group_by(object, period, grouping, param, filter):
-    data = []
-    for obj in object:
-        match period:
-            case "Day":
-                today = datetime.date.today()
-                filters = {}
-                property_filter = "%s%s" % (filter, "__date")
-                total = 0
-                for x in reversed(range(7)):
-                    date_filter = today - relativedelta(days=x)
-                    filters[property_filter] = date_filter
-                    filters[grouping] = getattr(obj, grouping)
-                    count = object.aggregate(
-                        total=Coalesce(Count(param, filter=Q(**filters)), 0, output_field=IntegerField())
-                    ).get("total")
-                    total += count
-
-                data.append({"name": getattr(obj, grouping), "total": total})
-            case "Month":
-                today = datetime.date.today()
-                filters = {}
-                property_filter = "%s%s" % (filter, "__month")
-                total = 0
-                for x in reversed(range(6)):
-                    date_filter = today - relativedelta(months=x)
-                    filters[property_filter] = date_filter.month
-                    filters[grouping] = getattr(obj, grouping)
-                    count = object.aggregate(
-                        total=Coalesce(Count(param, filter=Q(**filters)), 0, output_field=IntegerField())
-                    ).get("total")
-                    total += count
-
-                data.append({"name": getattr(obj, grouping), "total": total})
-            case "Year":
-                today = datetime.date.today()
-                filters = {}
-                property_filter = "%s%s" % (filter, "__year")
-                total = 0
-                for x in reversed(range(6)):
-                    date_filter = today - relativedelta(years=x)
-                    filters[property_filter] = date_filter.year
-                    filters[grouping] = getattr(obj, grouping)
-                    count = object.aggregate(
-                        total=Coalesce(Count(param, filter=Q(**filters)), 0, output_field=IntegerField())
-                    ).get("total")
-                    total += count
-
-                data.append({"name": getattr(obj, grouping), "total": total})
-            case _:
-                return []
-    else:
-        return data
+
+def get_period_label(period, bucket):
+    match period:
+        case "Day":
+            return bucket
+        case "Month":
+            return "-".join((str(bucket.year), "{:02d}".format(bucket.month)))
+        case "Year":
+            return str(bucket.year)
+
+
+def get_period_filter(period, buckets, filter):
+    start, end = get_period_range(period, buckets)
+    return {"%s%s" % (filter, "__gte"): start, "%s%s" % (filter, "__lt"): end}
+
+
+def get_obj_period_aggregates(obj, period, period_length, aggregates, filter, default):
+    buckets = get_period_buckets(period, period_length)
+    if not buckets:
+        return [[] for aggregate in aggregates]
+
+    rows = (
+        obj.filter(**get_period_filter(period, buckets, filter))
+        .annotate(
+            bucket=Trunc(filter, period.lower(), output_field=DateField(), tzinfo=timezone.get_current_timezone())
+        )
+        .values("bucket")
+        .annotate(**{"total_%s" % (index): aggregate for index, aggregate in enumerate(aggregates)})
+        .order_by()
+    )
+    totals = {row["bucket"]: row for row in rows}
+
+    return [
+        [
+            {
+                "period": get_period_label(period, bucket),
+                "total": totals[bucket]["total_%s" % (index)] if bucket in totals else default,
+            }
+            for bucket in buckets
+        ]
+        for index, aggregate in enumerate(aggregates)
+    ]
 
 
-def get_obj_total_group_by(object, period, grouping, param, filter):
-    data = []
-    for obj in object:
-        match period:
-            case "Day":
-                today = datetime.date.today()
-                filters = {}
-                property_filter = "%s%s" % (filter, "__date")
-                total = 0
-                for x in reversed(range(7)):
-                    date_filter = today - relativedelta(days=x)
-                    filters[property_filter] = date_filter
-                    filters[grouping] = getattr(obj, grouping)
-                    sum = object.aggregate(
-                        total=Coalesce(Sum(param, filter=Q(**filters)), 0, output_field=DecimalField())
-                    ).get("total")
-                    total += sum
-
-                data.append({"name": getattr(obj, grouping), "total": total})
-            case "Month":
-                today = datetime.date.today()
-                filters = {}
-                property_filter = "%s%s" % (filter, "__month")
-                total = 0
-                for x in reversed(range(6)):
-                    date_filter = today - relativedelta(months=x)
-                    filters[property_filter] = date_filter.month
-                    filters[grouping] = getattr(obj, grouping)
-                    sum = object.aggregate(
-                        total=Coalesce(Sum(param, filter=Q(**filters)), 0, output_field=DecimalField())
-                    ).get("total")
-                    total += sum
-
-                data.append({"name": getattr(obj, grouping), "total": total})
-            case "Year":
-                today = datetime.date.today()
-                filters = {}
-                property_filter = "%s%s" % (filter, "__year")
-                total = 0
-                for x in reversed(range(6)):
-                    date_filter = today - relativedelta(years=x)
-                    filters[property_filter] = date_filter.year
-                    filters[grouping] = getattr(obj, grouping)
-                    sum = object.aggregate(
-                        total=Coalesce(Sum(param, filter=Q(**filters)), 0, output_field=DecimalField())
-                    ).get("total")
-                    total += sum
-
-                data.append({"name": getattr(obj, grouping), "total": total})
-            case _:
-                return []
-    else:
-        return data
+def get_obj_period_totals(obj, period, period_length, aggregate, filter, default):
+    return get_obj_period_aggregates(obj, period, period_length, [aggregate], filter, default)[0]
 
 
-def get_obj_aggregate_count(object, period, param, filter, description):
+def get_obj_count(obj, period, param, filter):
     match period:
         case "Day":
             period_length = 7
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__date")
-            total = 0
-            for x in reversed(range(period_length)):
-                date_filter = today - relativedelta(days=x)
-                filters[property_filter] = date_filter
-                count = object.aggregate(
-                    total=Coalesce(Count(param, filter=Q(**filters)), 0, output_field=IntegerField())
-                ).get("total")
-                total += count
-            return {"total": total, "description": "%s for the past %s days" % (description, period_length)}
         case "Month":
             period_length = 6
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__month")
-            total = 0
-            for x in reversed(range(period_length)):
-                date_filter = today - relativedelta(months=x)
-                filters[property_filter] = date_filter.month
-                count = object.aggregate(
-                    total=Coalesce(Count(param, filter=Q(**filters)), 0, output_field=IntegerField())
-                ).get("total")
-                total += count
-            return {"total": total, "description": "%s for the past %s months" % (description, period_length)}
         case "Year":
+            period_length = 3
+        case _:
+            return []
+
+    return get_obj_period_totals(
+        obj, period, period_length, Coalesce(Count(param), 0, output_field=IntegerField()), filter, 0
+    )
+
+
+def get_obj_totals(obj, period, params, filter):
+    match period:
+        case "Day":
+            period_length = 7
+        case "Month":
             period_length = 6
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__year")
-            total = 0
-            for x in reversed(range(period_length)):
-                date_filter = today - relativedelta(years=x)
-                filters[property_filter] = date_filter.year
-                count = object.aggregate(
-                    total=Coalesce(Count(param, filter=Q(**filters)), 0, output_field=IntegerField())
-                ).get("total")
-                total += count
-            return {"total": total, "description": "%s for the past %s years" % (description, period_length)}
+        case "Year":
+            period_length = 3
         case _:
-            return {}
+            return [[] for param in params]
 
+    return get_obj_period_aggregates(
+        obj,
+        period,
+        period_length,
+        [Coalesce(Sum(param), 0, output_field=DecimalField()) for param in params],
+        filter,
+        decimal.Decimal(0),
+    )
 
-def get_obj_aggregate_total(object, period, param, filter, label, description):
+
+def get_obj_group_totals(object, period, grouping, aggregate, filter):
     match period:
         case "Day":
             period_length = 7
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__date")
-            total = 0
-            for x in reversed(range(period_length)):
-                date_filter = today - relativedelta(days=x)
-                filters[property_filter] = date_filter
-                sum = object.aggregate(
-                    total=Coalesce(Sum(param, filter=Q(**filters)), 0, output_field=IntegerField())
-                ).get("total")
-                total += sum
-            return {
-                "total": total,
-                "description": "%s for the past %s days" % (description, period_length),
-                "label": label,
-            }
         case "Month":
             period_length = 6
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__month")
-            total = 0
-            for x in reversed(range(period_length)):
-                date_filter = today - relativedelta(months=x)
-                filters[property_filter] = date_filter.month
-                sum = object.aggregate(
-                    total=Coalesce(Sum(param, filter=Q(**filters)), 0, output_field=IntegerField())
-                ).get("total")
-                total += sum
-            return {
-                "total": total,
-                "description": "%s for the past %s months" % (description, period_length),
-                "label": label,
-            }
         case "Year":
             period_length = 6
-            today = datetime.date.today()
-            filters = {}
-            property_filter = "%s%s" % (filter, "__year")
-            total = 0
-            for x in reversed(range(period_length)):
-                date_filter = today - relativedelta(years=x)
-                filters[property_filter] = date_filter.year
-                sum = object.aggregate(
-                    total=Coalesce(Sum(param, filter=Q(**filters)), 0, output_field=IntegerField())
-                ).get("total")
-                total += sum
-
-            return {
-                "total": total,
-                "description": "%s for the past %s years" % (description, period_length),
-                "label": label,
-            }
         case _:
-            return {}
+            return []
+
+    buckets = get_period_buckets(period, period_length)
+    rows = (
+        object.filter(**get_period_filter(period, buckets, filter))
+        .values(grouping)
+        .annotate(total=aggregate)
+        .order_by(grouping)
+    )
+
+    return [{"name": row[grouping], "total": row["total"]} for row in rows]
+
+
+def get_obj_count_group_by(object, period, grouping, param, filter):
+    return get_obj_group_totals(
+        object, period, grouping, Coalesce(Count(param), 0, output_field=IntegerField()), filter
+    )
+
+
+def get_obj_total_group_by(object, period, grouping, param, filter):
+    return get_obj_group_totals(object, period, grouping, Coalesce(Sum(param), 0, output_field=DecimalField()), filter)
+
+
+def get_aggregate_period_length(period):
+    match period:
+        case "Day":
+            return 7, "days"
+        case "Month":
+            return 6, "months"
+        case "Year":
+            return 6, "years"
+        case _:
+            return None, None
+
+
+def get_obj_aggregate_count(object, period, param, filter, description):
+    period_length, period_name = get_aggregate_period_length(period)
+    if not period_length:
+        return {}
+
+    buckets = get_period_buckets(period, period_length)
+    total = (
+        object.filter(**get_period_filter(period, buckets, filter))
+        .aggregate(total=Coalesce(Count(param), 0, output_field=IntegerField()))
+        .get("total")
+    )
+    return {"total": total, "description": "%s for the past %s %s" % (description, period_length, period_name)}
+
+
+def get_obj_aggregate_totals(object, period, params, filter, description=None):
+    period_length, period_name = get_aggregate_period_length(period)
+    if not period_length:
+        return [{} for param in params]
+
+    buckets = get_period_buckets(period, period_length)
+    totals = object.filter(**get_period_filter(period, buckets, filter)).aggregate(
+        **{
+            "total_%s" % (index): Coalesce(Sum(param), 0, output_field=IntegerField())
+            for index, (param, label) in enumerate(params)
+        }
+    )
+
+    return [
+        {
+            "total": totals.get("total_%s" % (index)),
+            "description": "%s for the past %s %s" % (description or label, period_length, period_name),
+            "label": label,
+        }
+        for index, (param, label) in enumerate(params)
+    ]
+
+
+def get_obj_aggregate_total(object, period, param, filter, label, description=None):
+    return get_obj_aggregate_totals(object, period, [(param, label)], filter, description)[0]
@@ -0,0 +1,152 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+_locals = {}
+_locks = {}
+_stats = {}
+
+
+def shared_cache_key(key, key_prefix, version):
+    return key
+
+
+class TieredCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._local_max_entries = int(options.get("LOCAL_MAX_ENTRIES", 1000))
+        self._local_timeout = float(options.get("LOCAL_TIMEOUT", 5))
+        self._shared_only_prefixes = tuple(options.get("SHARED_ONLY_PREFIXES", ()))
+        self._shared = FileBasedCache(
+            location,
+            {
+                "TIMEOUT": params.get("TIMEOUT", 300),
+                "KEY_FUNCTION": shared_cache_key,
+                "OPTIONS": {
+                    "MAX_ENTRIES": options.get("MAX_ENTRIES", 10000),
+                    "CULL_FREQUENCY": options.get("CULL_FREQUENCY", 3),
+                },
+            },
+        )
+        self._local = _locals.setdefault(location, OrderedDict())
+        self._lock = _locks.setdefault(location, threading.Lock())
+        self._stats = _stats.setdefault(
+            location,
+            {
+                "local_hits": 0,
+                "shared_hits": 0,
+                "misses": 0,
+                "sets": 0,
+                "deletes": 0,
+                "evictions": 0,
+            },
+        )
+
+    def _incr_stat(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _get_local_expiry(self, timeout):
+        expiry = time.time() + self._local_timeout
+        if timeout is None:
+            return expiry
+        return min(expiry, timeout)
+
+    def _is_local(self, key):
+        return not key.startswith(self._shared_only_prefixes)
+
+    def _set_local(self, key, value, timeout):
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._lock:
+            self._local[key] = (self._get_local_expiry(timeout), pickled)
+            self._local.move_to_end(key)
+            while len(self._local) > self._local_max_entries:
+                self._local.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _delete_local(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        is_local = self._is_local(key)
+        key = self.make_and_validate_key(key, version=version)
+        if not self._shared.add(key, value, timeout):
+            return False
+
+        if is_local:
+            self._set_local(key, value, self.get_backend_timeout(timeout))
+        self._incr_stat("sets")
+        return True
+
+    def get(self, key, default=None, version=None):
+        is_local = self._is_local(key)
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expiry, pickled = entry
+                if expiry > time.time():
+                    self._local.move_to_end(key)
+                    self._stats["local_hits"] += 1
+                    return pickle.loads(pickled)
+                del self._local[key]
+
+        value = self._shared.get(key, self)
+        if value is self:
+            self._incr_stat("misses")
+            return default
+
+        self._incr_stat("shared_hits")
+        if is_local:
+            self._set_local(key, value, None)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        is_local = self._is_local(key)
+        key = self.make_and_validate_key(key, version=version)
+        self._shared.set(key, value, timeout)
+        if is_local:
+            self._set_local(key, value, self.get_backend_timeout(timeout))
+        self._incr_stat("sets")
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._delete_local(key)
+        return self._shared.touch(key, timeout)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._delete_local(key)
+        self._incr_stat("deletes")
+        return self._shared.delete(key)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and entry[0] > time.time():
+                return True
+
+        return self._shared.has_key(key)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self._shared.clear()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["local_entries"] = len(self._local)
+
+        stats["local_max_entries"] = self._local_max_entries
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["local_hits"] + stats["shared_hits"]) / lookups if lookups else None
+        return stats
@@ -132,13 +132,14 @@ TEMPLATES = [
 
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
-    "DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("vanguard.authentication.RoleTokenAuthentication",),
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "100/minute", "user": "10000/day"},
     "DATE_INPUT_FORMATS": ["iso-8601", "%Y-%m-%dT%H:%M:%S.%fZ"],
+    "DEFAULT_PAGINATION_CLASS": "vanguard.pagination.ListPagination",
 }
 
 SIMPLE_JWT = {
@@ -172,6 +173,9 @@ WSGI_APPLICATION = "dawnbringer.wsgi.application"
 
 # Logger
 LOG_PATH = os.path.join(BASE_DIR, "logs/")
+# Log files are written by a background listener and rotated at this size
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -182,23 +186,29 @@ LOGGING = {
         },
     },
     "handlers": {
-        "console": {"level": "DEBUG", "class": "logging.StreamHandler", "formatter": "verbose"},
+        "console": {"level": "DEBUG", "class": "logs.handlers.QueuedStreamHandler", "formatter": "verbose"},
         "file_debug_django": {
             "level": "DEBUG",
-            "class": "logging.FileHandler",
+            "class": "logs.handlers.QueuedRotatingFileHandler",
             "filename": LOG_PATH + "django.log",
+            "maxBytes": LOG_MAX_BYTES,
+            "backupCount": LOG_BACKUP_COUNT,
             "formatter": "verbose",
         },
         "file_debug_django_requests": {
             "level": "DEBUG",
-            "class": "logging.FileHandler",
+            "class": "logs.handlers.QueuedRotatingFileHandler",
             "filename": LOG_PATH + "requests.log",
+            "maxBytes": LOG_MAX_BYTES,
+            "backupCount": LOG_BACKUP_COUNT,
             "formatter": "verbose",
         },
         "file_error_django_requests": {
             "level": "ERROR",
-            "class": "logging.FileHandler",
+            "class": "logs.handlers.QueuedRotatingFileHandler",
             "filename": LOG_PATH + "error_requests.log",
+            "maxBytes": LOG_MAX_BYTES,
+            "backupCount": LOG_BACKUP_COUNT,
             "formatter": "verbose",
         },
     },
@@ -289,10 +299,19 @@ EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 # Set Max Upload Size to 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760
 
+# Per-process memory cache in front of a shared file cache. LOCAL_TIMEOUT is the
+# most seconds a process serves a value another process may have changed, keys
+# with SHARED_ONLY_PREFIXES always read the shared store
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
-        "LOCATION": "cache_table",
+        "BACKEND": "dawnbringer.cache.TieredCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache/"),
+        "OPTIONS": {
+            "LOCAL_MAX_ENTRIES": 5000,
+            "LOCAL_TIMEOUT": 5,
+            "MAX_ENTRIES": 50000,
+            "SHARED_ONLY_PREFIXES": ("throttle_",),
+        },
     }
 }
 
@@ -303,3 +322,48 @@ USER_ONLINE_TIMEOUT = 300
 # Number of seconds that we will keep track of inactive users before
 # their last seen is removed from the cache
 USER_LASTSEEN_TIMEOUT = 60 * 60 * 24 * 7
+
+# Number of seconds a worker buffers last seen timestamps in memory before
+# writing them to the cache in one batch
+USER_PRESENCE_FLUSH_INTERVAL = 30
+
+# Store one referral activity per order line with the quantity folded into
+# the amount instead of one activity per unit
+COMP_PLAN_FOLD_QUANTITY = False
+
+# Backend used by the send_queued_emails worker, None falls back to EMAIL_BACKEND.
+# Use django.core.mail.backends.console.EmailBackend or filebased.EmailBackend
+# (with EMAIL_FILE_PATH) as a stand-in for SMTP when testing
+EMAIL_OUTBOX_BACKEND = None
+
+# Delivery attempts before an outbox email is marked failed, the base retry
+# delay in seconds (doubled after each failed attempt) and the seconds a worker
+# may hold a claimed batch before another worker picks it up again
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 600
+
+# Seconds a worker serves System Settings from its local copy before checking
+# the shared version stamp for changes made by other workers
+SETTINGS_CACHE_CHECK_INTERVAL = 5
+
+# Seconds a rendered shop catalog snapshot is kept, snapshots are keyed by the
+# catalog version so saves to catalog and page models replace them sooner
+CATALOG_SNAPSHOT_TIMEOUT = 60 * 60
+
+# Seconds a worker trusts the cached role and permission versions that access
+# token claims are checked against, role changes also clear them on commit
+ROLE_VERSION_CACHE_TIMEOUT = 60
+
+# User Logs are queued and written with one insert per batch once this many are
+# pending, when this many seconds have passed, at request end and at shutdown
+USER_LOGS_FLUSH_SIZE = 100
+USER_LOGS_FLUSH_INTERVAL = 5
+
+# Seconds a stored response is replayed for a retried Idempotency-Key before
+# the key can be used for a new request
+IDEMPOTENCY_KEY_TIMEOUT = 60 * 60 * 24
+
+# Seconds a key stays claimed by a request that has not finished. After this
+# the request is treated as abandoned and a retry may claim the key again
+IDEMPOTENCY_KEY_LEASE = 60 * 5
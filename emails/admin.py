@@ -1,5 +1,26 @@
 from django.contrib import admin
-from emails.models import EmailAddress, EmailTemplates
+from emails.models import EmailAddress, EmailOutbox, EmailTemplates
+
+
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "to_email",
+        "subject",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent",
+        "created",
+    )
+    list_filter = ("status",)
+    search_fields = ("to_email",)
+
+    class Meta:
+        model = EmailOutbox
+        verbose_name_plural = "Email Outbox"
+
 
 admin.site.register(EmailTemplates)
 admin.site.register(EmailAddress)
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
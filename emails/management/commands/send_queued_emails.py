@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from emails.services import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Send queued emails from the Email Outbox over one connection per batch"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--loop", action="store_true", help="Keep polling the outbox until interrupted")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to wait when the outbox is empty")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_emails(batch_size=options["batch_size"])
+            if sent or failed:
+                self.stdout.write(self.style.SUCCESS("Sent %s emails, %s failed." % (sent, failed)))
+
+            if not options["loop"]:
+                break
+
+            if sent + failed < options["batch_size"]:
+                time.sleep(options["interval"])
@@ -1,4 +1,6 @@
 from django.db import models
+from django.utils import timezone
+from emails.enums import EmailStatus
 
 
 class EmailTemplates(models.Model):
@@ -64,3 +66,37 @@ class EmailInquiry(models.Model):
 
     def __str__(self):
         return "%s" % (self.subject)
+
+
+class EmailOutbox(models.Model):
+    subject = models.TextField(
+        blank=True,
+        null=True,
+    )
+    body = models.TextField(
+        blank=True,
+        null=True,
+    )
+    to_email = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=30,
+        choices=EmailStatus.choices,
+        default=EmailStatus.QUEUED,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(
+        blank=True,
+        null=True,
+    )
+    sent = models.DateTimeField(blank=True, null=True)
+    created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=("status", "next_attempt_at")),
+        ]
+
+    def __str__(self):
+        return "%s : %s - %s" % (self.to_email, self.subject, self.status)
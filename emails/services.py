@@ -1,11 +1,16 @@
+import datetime
+from django.conf import settings
 from django.core.mail import EmailMessage, get_connection
 from django.core.mail.backends.smtp import EmailBackend
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.template import Template, Context
 from django.template.loader import render_to_string
+from django.utils import timezone
 from core.enums import Settings
 from core.services import get_setting
-from emails.models import EmailAddress, EmailTemplates
+from emails.enums import EmailStatus
+from emails.models import EmailAddress, EmailOutbox, EmailTemplates
 from settings.models import Company
 from settings.serializers import CompanySerializer
 
@@ -25,27 +30,29 @@ def render_template(template, context):
     return render_to_string(template, context)
 
 
-def send_email(connection, from_email, subject, body, to_email):
-    try:
-        email_msg = EmailMessage(
-            connection=connection,
-            subject=subject,
-            body=body,
-            from_email=from_email,
-            to=[to_email],
-            reply_to=[from_email],
-        )
-        email_msg.content_subtype = "html"
-        email_msg.send()
-        return "Email Sent"
-    except:
-        return "Email failed, try again later."
+def queue_email_payload(subject, body, to_email):
+    if not to_email:
+        return None
 
+    EmailOutbox.objects.create(subject=subject, body=body, to_email=to_email)
+    return "Email Queued"
 
-def construct_and_send_email_payload(subject, body, to_email):
-    email_settings = get_main_email_settings()
 
-    connection = get_connection(
+def queue_email_payloads(payloads):
+    emails = [
+        EmailOutbox(subject=subject, body=body, to_email=to_email)
+        for subject, body, to_email in filter(None, payloads)
+        if to_email
+    ]
+    return len(EmailOutbox.objects.bulk_create(emails))
+
+
+def get_outbox_connection(email_settings):
+    if email_settings is None:
+        return get_connection(backend=settings.EMAIL_OUTBOX_BACKEND)
+
+    return get_connection(
+        backend=settings.EMAIL_OUTBOX_BACKEND,
         host=email_settings.server_host,
         port=email_settings.server_port,
         username=email_settings.server_host_user,
@@ -54,11 +61,77 @@ def construct_and_send_email_payload(subject, body, to_email):
         use_ssl=email_settings.server_use_ssl,
     )
 
-    email_msg = send_email(
-        connection=connection,
-        from_email=email_settings.server_host_user,
-        subject=subject,
-        body=body,
-        to_email=to_email,
-    )
-    return email_msg
+
+def claim_queued_emails(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=(EmailStatus.QUEUED, EmailStatus.SENDING), next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        EmailOutbox.objects.filter(pk__in=[email.pk for email in emails]).update(
+            status=EmailStatus.SENDING,
+            next_attempt_at=now + datetime.timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT),
+        )
+
+    return emails
+
+
+def reschedule_email(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = EmailStatus.FAILED
+    else:
+        email.status = EmailStatus.QUEUED
+        email.next_attempt_at = now + datetime.timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+        )
+
+
+def send_queued_emails(batch_size=50):
+    emails = claim_queued_emails(batch_size)
+    if not emails:
+        return 0, 0
+
+    email_settings = get_main_email_settings()
+    from_email = email_settings.server_host_user if email_settings else settings.DEFAULT_FROM_EMAIL
+    connection = get_outbox_connection(email_settings)
+    now = timezone.now()
+
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            reschedule_email(email, e, now)
+    else:
+        try:
+            for email in emails:
+                email_msg = EmailMessage(
+                    connection=connection,
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=from_email,
+                    to=[email.to_email],
+                    reply_to=[from_email],
+                )
+                email_msg.content_subtype = "html"
+                try:
+                    connection.send_messages([email_msg])
+                except Exception as e:
+                    reschedule_email(email, e, now)
+                else:
+                    email.attempts += 1
+                    email.status = EmailStatus.SENT
+                    email.sent = timezone.now()
+                    email.last_error = None
+        finally:
+            connection.close()
+
+    for email in emails:
+        email.modified = timezone.now()
+    EmailOutbox.objects.bulk_update(emails, ["status", "attempts", "next_attempt_at", "last_error", "sent", "modified"])
+
+    sent = len([email for email in emails if email.status == EmailStatus.SENT])
+    return sent, len(emails) - sent
@@ -0,0 +1,42 @@
+import atexit
+import copy
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class QueuedHandler(QueueHandler):
+    def __init__(self, target):
+        super().__init__(queue.SimpleQueue())
+        self.target = target
+        self.listener = QueueListener(self.queue, target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        return copy.copy(record)
+
+    def stop(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        self.stop()
+        self.target.close()
+        super().close()
+
+
+class QueuedRotatingFileHandler(QueuedHandler):
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding=None, delay=False):
+        super().__init__(
+            RotatingFileHandler(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=delay)
+        )
+
+
+class QueuedStreamHandler(QueuedHandler):
+    def __init__(self, stream=None):
+        super().__init__(logging.StreamHandler(stream))
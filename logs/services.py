@@ -1,19 +1,47 @@
 import logging
 import json
-from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
 
 logger = logging.getLogger(__name__)
 
 
+class LogJSONEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+class StructuredMessage:
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return json.dumps(self.data, cls=LogJSONEncoder)
+
+
+def get_log_data(obj):
+    if isinstance(obj, models.Model):
+        return {
+            "model": obj._meta.label_lower,
+            "pk": obj.pk,
+            "fields": {
+                field.attname: getattr(obj, field.attname)
+                for field in obj._meta.concrete_fields
+                if not field.primary_key and field.attname in obj.__dict__
+            },
+        }
+    return obj
+
+
+def log_object(log, level, message, obj):
+    if log.isEnabledFor(level):
+        log.log(level, "%s: %s", message, StructuredMessage(get_log_data(obj)))
+
+
 def create_log(log_type=None, message=None, obj=None):
-    match log_type:
-        case "DEBUG":
-            return logger.debug(message + ": " + json.dumps(obj))
-        case "INFO":
-            return logger.info(message + ": " + serializers.serialize("json", [obj]))
-        case "WARNING":
-            return logger.warning(message + ": " + json.dumps(obj))
-        case "ERROR":
-            return logger.error(message + ": " + json.dumps(obj))
-        case "CRITICAL":
-            return logger.critical(message + ": " + json.dumps(obj))
+    level = logging.getLevelName(log_type)
+    if isinstance(level, int):
+        return log_object(logger, level, message, obj)
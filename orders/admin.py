@@ -7,6 +7,7 @@ from orders.models import (
     OrderAddress,
     OrderAttachments,
     OrderHistory,
+    OrderReferralEarning,
 )
 
 class OrderAdmin(admin.ModelAdmin):
@@ -49,3 +50,4 @@ admin.site.register(OrderFee)
 admin.site.register(OrderAddress)
 admin.site.register(OrderAttachments)
 admin.site.register(OrderHistory)
+admin.site.register(OrderReferralEarning)
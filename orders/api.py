@@ -1,14 +1,15 @@
 from django.db.models.functions import TruncMonth
-from django.db.models import Prefetch, Q, Max, F, Prefetch, Count
+from django.db.models import Prefetch, Max, Prefetch, Count
 from rest_framework import status, views, permissions
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from logs.services import create_log
-from core.services import comp_plan
-from orders.enums import OrderStatus, OrderType
+from core.services import comp_plan, record_order_referral_earnings
+from orders.enums import OrderStatus
 from orders.models import (
     Order,
     OrderHistory,
+    OrderReferralEarning,
     Customer,
 )
 from orders.serializers import (
@@ -23,16 +24,22 @@ from orders.serializers import (
 from orders.services import (
     check_for_exclusive_product_variant,
     check_order_stocks,
+    create_bulk_order_histories,
     create_order_initial_history,
     get_account,
+    get_excluded_order_statuses,
     get_or_create_customer,
     notify_customer_on_order_update_by_email,
+    process_bulk_order_history_request,
     process_order_request,
     process_order_history_request,
     process_attachments,
+    snapshot_order_details,
     transform_order_form_data_to_json,
 )
+from products.services import update_branch_stock_on_order_status
 from users.models import User
+from vanguard.idempotency import idempotent
 from vanguard.permissions import IsDeveloperUser, IsAdminUser, IsStaffUser, IsMemberUser
 
 
@@ -42,6 +49,8 @@ class CustomersListViewSet(ModelViewSet):
     serializer_class = CustomersListSerializer
     permission_classes = [IsDeveloperUser | IsAdminUser | IsStaffUser]
     http_method_names = ["get"]
+    pagination_ordering = ("-id",)
+    pagination_offset = True
 
     def get_queryset(self):
         return Customer.objects.order_by("-id")
@@ -65,6 +74,8 @@ class OrdersListAdminViewSet(ModelViewSet):
     serializer_class = OrdersListSerializer
     permission_classes = [IsDeveloperUser | IsAdminUser | IsStaffUser]
     http_method_names = ["get"]
+    pagination_ordering = ("-id",)
+    pagination_offset = True
 
     def get_queryset(self):
         branch_id = self.request.query_params.get("branch_id", None)
@@ -121,26 +132,20 @@ class OrderInfoMemberViewSet(ModelViewSet):
 
 
 class ReferralOrdersListMemberViewSet(ModelViewSet):
-    queryset = Order.objects.all()
+    queryset = OrderReferralEarning.objects.all()
     serializer_class = ReferralOrdersListSerializer
     permission_classes = [IsMemberUser]
     http_method_names = ["get"]
+    pagination_ordering = ("-order_id",)
+    pagination_offset = True
 
     def get_queryset(self):
         user = User.objects.get(id=self.request.user.pk, is_active=True)
         if user is not None:
             return (
-                Order.objects.order_by("-id")
-                .annotate(first_level=F("promo_code__account__user"))
-                .annotate(second_level=F("promo_code__account__referrer__user"))
-                .annotate(third_level=F("promo_code__account__referrer__referrer__user"))
-                .annotate(fourth_level=F("promo_code__account__referrer__referrer__referrer__user"))
-                .filter(
-                    Q(first_level=self.request.user.pk)
-                    | Q(second_level=self.request.user.pk)
-                    | Q(third_level=self.request.user.pk)
-                    | Q(fourth_level=self.request.user.pk)
-                )
+                OrderReferralEarning.objects.filter(account__user=user)
+                .select_related("order", "membership_level")
+                .order_by("-order_id")
             )
 
 
@@ -148,6 +153,7 @@ class ReferralOrdersListMemberViewSet(ModelViewSet):
 class CreateOrderView(views.APIView):
     permission_classes = []
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         account = None
         customer = None
@@ -169,6 +175,8 @@ class CreateOrderView(views.APIView):
                 email_msg = None
                 has_failed_upload = False
                 created_order = serializer.save()
+                if created_order.promo_code:
+                    record_order_referral_earnings(created_order)
                 email_msg = notify_customer_on_order_update_by_email(created_order)
                 has_failed_upload = process_attachments(created_order, request.data)
                 create_log("INFO", "Created Order", created_order)
@@ -209,11 +217,13 @@ class CreateOrderHistoryView(views.APIView):
             serializer = CreateOrderHistorySerializer(data=process_order_history)
             if serializer.is_valid():
                 created_order_history = serializer.save()
+                update_branch_stock_on_order_status(created_order_history)
                 email_msg = None
                 if created_order_history.email_sent:
                     email_msg = notify_customer_on_order_update_by_email(created_order_history.order)
 
                 if created_order_history.order_status == OrderStatus.COMPLETED:
+                    snapshot_order_details(created_order_history.order)
                     email_msg = check_for_exclusive_product_variant(created_order_history)
                     if created_order_history.order.promo_code:
                         comp_plan(request, created_order_history.order)
@@ -228,6 +238,24 @@ class CreateOrderHistoryView(views.APIView):
                 )
 
 
+class BulkCreateOrderHistoryView(views.APIView):
+    permission_classes = [IsDeveloperUser | IsAdminUser | IsStaffUser]
+
+    def post(self, request, *args, **kwargs):
+        orders, errors = process_bulk_order_history_request(request)
+        if errors:
+            return Response(
+                data={"detail": "Unable to update Orders.", "errors": errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        histories, messages = create_bulk_order_histories(request, orders)
+        detail = "%s Orders updated." % (len(histories))
+        if messages:
+            detail = " ".join([detail] + [message for message in messages if message])
+        return Response(data={"detail": detail}, status=status.HTTP_201_CREATED)
+
+
 class GetOrderStatusView(views.APIView):
     permission_classes = [IsDeveloperUser | IsAdminUser | IsStaffUser]
 
@@ -235,14 +263,7 @@ class GetOrderStatusView(views.APIView):
         order_status = request.data.get("order_status")
         order_type = request.data.get("order_type")
 
-        StatusFilter = []
-        match order_type:
-            case OrderType.PICKUP:
-                StatusFilter.append(OrderStatus.AWAITING_DELIVERY)
-                StatusFilter.append(OrderStatus.ON_DELIVERY)
-            case OrderType.DELIVERY:
-                StatusFilter.append(OrderStatus.AWAITING_PICKUP)
-                StatusFilter.append(OrderStatus.ON_PICKUP)
+        StatusFilter = get_excluded_order_statuses(order_type)
 
         status_arr = []
         for os in OrderStatus:
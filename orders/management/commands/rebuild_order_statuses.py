@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from orders.services import rebuild_order_current_statuses
+
+
+class Command(BaseCommand):
+    help = "Recompute the current status columns of Orders from their latest Order History"
+
+    def handle(self, *args, **options):
+        orders = rebuild_order_current_statuses()
+        self.stdout.write(self.style.SUCCESS("Rebuilt current status of %s orders." % (orders)))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core.services import rebuild_order_referral_earnings
+
+
+class Command(BaseCommand):
+    help = "Recompute the referral earnings index of Orders with a Promo Code"
+
+    def handle(self, *args, **options):
+        earnings = rebuild_order_referral_earnings()
+        self.stdout.write(self.style.SUCCESS("Rebuilt %s referral earnings." % (earnings)))
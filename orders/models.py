@@ -1,4 +1,5 @@
 import datetime
+import decimal
 import uuid
 from django.db import models
 from django.utils import timezone
@@ -77,8 +78,23 @@ class Order(models.Model):
         blank=True,
     )
     order_date = models.DateTimeField(blank=True, null=True)
+    current_status = models.CharField(
+        max_length=30,
+        choices=OrderStatus.choices,
+        null=True,
+        blank=True,
+    )
+    current_stage = models.PositiveSmallIntegerField(null=True, blank=True)
+    status_changed_at = models.DateTimeField(blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=("branch", "current_status")),
+            models.Index(fields=("branch", "current_stage")),
+            models.Index(fields=("current_status", "order_date")),
+        ]
+
     def __str__(self):
         return "%s : %s %s %s" % (
             self.customer,
@@ -91,26 +107,10 @@ class Order(models.Model):
         return str(self.id).zfill(6)
 
     def get_last_order_status(self):
-        try:
-            return self.histories.latest("created").order_status
-        except:
-            return None
+        return self.current_status
 
     def get_last_order_stage(self):
-        try:
-            match self.histories.latest("created").order_status:
-                case OrderStatus.PENDING:
-                    return 1
-                case OrderStatus.AWAITING_DELIVERY | OrderStatus.AWAITING_PICKUP:
-                    return 2
-                case OrderStatus.ON_DELIVERY:
-                    return 3
-                case OrderStatus.CANCELLED | OrderStatus.COMPLETED | OrderStatus.REFUNDED:
-                    return 4
-                case _:
-                    None
-        except:
-            return None
+        return self.current_stage
 
     def get_promo_code_account_four_levels(self):
         if self.promo_code:
@@ -120,12 +120,11 @@ class Order(models.Model):
     def get_order_total_point_values(self):
         data = {}
         for detail in self.details.all():
-            for value in detail.product_variant.point_values.all():
-                data[value.membership_level.level] = {
-                    "total": data.get(value.membership_level.level, {}).get("total", 0)
-                    + (value.point_value * detail.quantity),
-                    "level": value.membership_level.level,
-                    "membership_level": value.membership_level.name,
+            for value in detail.get_point_values():
+                data[value["level"]] = {
+                    "total": data.get(value["level"], {}).get("total", 0) + (value["point_value"] * detail.quantity),
+                    "level": value["level"],
+                    "membership_level": value["name"],
                 }
 
         return data
@@ -180,22 +179,47 @@ class OrderDetail(models.Model):
     total_amount = models.DecimalField(
         default=0, max_length=256, decimal_places=2, max_digits=13, blank=True, null=True
     )
+    pricing_snapshot = models.JSONField(null=True, blank=True)
     created = models.DateTimeField(auto_now_add=True)
 
+    def get_point_values(self):
+        if self.pricing_snapshot is not None:
+            return [
+                {**value, "point_value": decimal.Decimal(value["point_value"])}
+                for value in self.pricing_snapshot.get("point_values", [])
+            ]
+
+        return [
+            {
+                "membership_level_id": value.membership_level_id,
+                "name": value.membership_level.name,
+                "level": value.membership_level.level,
+                "point_value": value.point_value,
+            }
+            for value in self.product_variant.point_values.all()
+            if value.membership_level is not None
+        ]
+
+    def get_pricing_snapshot(self):
+        price = getattr(self.product_variant, "price", None)
+        return {
+            "base_price": str(price.base_price) if price else None,
+            "discounted_price": str(price.discounted_price) if price else None,
+            "point_values": [
+                {**value, "point_value": str(value["point_value"])}
+                for value in self.get_point_values()
+                if value["point_value"] is not None
+            ],
+        }
+
     def get_total_point_values(self):
-        # data = {}
         data = []
-        for value in self.product_variant.point_values.all():
-            # data[value.membership_level.level] = {
-            #     "total": value.point_value * self.quantity,
-            #     "level": value.membership_level.level,
-            #     "membership_level": value.membership_level.name,
-            # }
+        for value in self.get_point_values():
             data.append(
                 {
-                    "total": value.point_value * self.quantity,
-                    "level": value.membership_level.level,
-                    "membership_level": value.membership_level.name,
+                    "total": value["point_value"] * self.quantity,
+                    "level": value["level"],
+                    "membership_level": value["name"],
                 }
             )
 
@@ -325,6 +349,23 @@ class OrderHistory(models.Model):
     def __str__(self):
         return "%s - %s" % (self.order, self.order_status)
 
+    def save(self, *args, **kwargs):
+        is_created = self._state.adding
+        super().save(*args, **kwargs)
+        if is_created and self.order_id:
+            self.set_as_current_status()
+
+    def set_as_current_status(self):
+        current = {
+            "current_status": self.order_status,
+            "current_stage": self.get_order_status_stage(),
+            "status_changed_at": self.created,
+        }
+        Order.objects.filter(pk=self.order_id).update(**current)
+        if OrderHistory.order.is_cached(self):
+            for field, value in current.items():
+                setattr(self.order, field, value)
+
     def get_order_status_stage(self):
         match self.order_status:
             case OrderStatus.PENDING:
@@ -356,6 +397,28 @@ class OrderHistory(models.Model):
                 return "Order Status moved to Refunded"
 
 
+class OrderReferralEarning(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="referral_earnings")
+    account = models.ForeignKey("accounts.Account", on_delete=models.CASCADE, related_name="referral_earnings")
+    level = models.PositiveSmallIntegerField()
+    membership_level = models.ForeignKey(
+        "core.MembershipLevel", on_delete=models.SET_NULL, related_name="referral_earnings", null=True, blank=True
+    )
+    point_total = models.DecimalField(default=0, decimal_places=2, max_digits=13)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("order", "account"), name="one_earning_per_order_account"),
+        ]
+        indexes = [
+            models.Index(fields=("account", "order")),
+        ]
+
+    def __str__(self):
+        return "%s - %s : %s" % (self.order, self.account, self.point_total)
+
+
 class Delivery(models.Model):
     branch = models.ForeignKey(
         "settings.Branch", on_delete=models.CASCADE, related_name="deliveries", null=True, blank=True
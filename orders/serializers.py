@@ -1,4 +1,5 @@
 import json
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 from accounts.models import Account
@@ -10,6 +11,7 @@ from orders.models import (
     OrderAddress,
     OrderAttachments,
     OrderHistory,
+    OrderReferralEarning,
 )
 
 # Orders
@@ -34,41 +36,29 @@ class ReferralOrderDetailsSerializer(ModelSerializer):
 
 
 class ReferralOrdersListSerializer(ModelSerializer):
-    order_number = serializers.CharField(source="get_order_number", required=False)
-    current_order_status = serializers.CharField(source="get_last_order_status", required=False)
+    order_id = serializers.UUIDField(source="order.order_id", required=False)
+    order_number = serializers.CharField(source="order.get_order_number", required=False)
+    current_order_status = serializers.CharField(source="order.current_status", required=False)
+    total_amount = serializers.DecimalField(
+        source="order.total_amount", max_digits=13, decimal_places=2, required=False
+    )
+    order_type = serializers.CharField(source="order.order_type", required=False)
 
     def to_representation(self, instance):
-        request = self.context.get("request")
-        point_value_membership_name = None
-        point_value_membership_level = None
-        point_value = 0
-
-        total_point_values = instance.get_order_total_point_values()
-        promo_code_levels = instance.get_promo_code_account_four_levels()
-        for promo_code_level in promo_code_levels:
-            account = promo_code_level.get("account")
-
-            if account.user.pk == request.user.pk:
-                level = promo_code_level.get("level")
-                point_value_level = total_point_values.get(level)
-
-                point_value_membership_name = point_value_level.get("membership_level")
-                point_value_membership_level = point_value_level.get("level")
-                point_value = point_value_level.get("total")
-
         data = super(ReferralOrdersListSerializer, self).to_representation(instance)
+        membership_level = instance.membership_level
         data.update(
             {
-                "point_value_membership_name": point_value_membership_name,
-                "point_value_membership_level": point_value_membership_level,
-                "point_value": point_value,
+                "point_value_membership_name": membership_level.name if membership_level else None,
+                "point_value_membership_level": membership_level.level if membership_level else None,
+                "point_value": instance.point_total,
             }
         )
 
         return data
 
     class Meta:
-        model = Order
+        model = OrderReferralEarning
         fields = [
             "order_id",
             "order_number",
@@ -260,8 +250,22 @@ class OrderInfoSerializer(ModelSerializer):
         ]
 
 
+class CreateOrderDetailsSerializer(ModelSerializer):
+    product_variant = serializers.IntegerField(source="product_variant_id")
+
+    class Meta:
+        model = OrderDetail
+        fields = [
+            "product_variant",
+            "quantity",
+            "amount",
+            "total_amount",
+            "discount",
+        ]
+
+
 class CreateOrderSerializer(ModelSerializer):
-    details = OrderDetailsSerializer(many=True, required=False)
+    details = CreateOrderDetailsSerializer(many=True, required=False)
     fees = OrderFeesSerializer(many=True, required=False)
     histories = OrderHistorySerializer(many=True, required=False)
     address = OrderAddressSerializer(required=False)
@@ -272,18 +276,17 @@ class CreateOrderSerializer(ModelSerializer):
         histories = validated_data.pop("histories")
         address = validated_data.pop("address")
 
-        order = Order.objects.create(**validated_data)
-
-        for detail in details:
-            OrderDetail.objects.create(**detail, order=order)
-
-        for fee in fees:
-            OrderFee.objects.create(**fee, order=order)
-
-        for history in histories:
-            OrderHistory.objects.create(**history, order=order)
-
-        OrderAddress.objects.create(**address, order=order)
+        with transaction.atomic():
+            order = Order.objects.create(**validated_data)
+            OrderDetail.objects.bulk_create([OrderDetail(**detail, order=order) for detail in details])
+            OrderFee.objects.bulk_create([OrderFee(**fee, order=order) for fee in fees])
+            histories = OrderHistory.objects.bulk_create(
+                [OrderHistory(**history, order=order) for history in histories]
+            )
+            OrderAddress.objects.create(**address, order=order)
+
+            if histories:
+                histories[-1].set_as_current_status()
 
         return order
 
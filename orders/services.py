@@ -2,15 +2,18 @@ import json
 import decimal
 import uuid
 from django.core.signing import Signer, BadSignature
+from django.db import transaction
+from django.db.models import OuterRef, Prefetch, Subquery, prefetch_related_objects
 from django.shortcuts import get_object_or_404
 from accounts.models import Account, Registration, Code
 from core.enums import Settings
-from core.services import get_setting
-from emails.services import construct_and_send_email_payload, render_template
-from orders.models import Customer, Order, OrderAttachments
+from core.services import comp_plan_orders, get_setting
+from emails.services import queue_email_payload, queue_email_payloads, render_template
+from orders.models import Customer, Order, OrderAttachments, OrderDetail, OrderHistory
 from orders.enums import OrderStatus, OrderType
 from orders.serializers import OrderInfoSerializer
-from products.models import ProductVariant
+from products.models import PointValue, ProductVariant
+from products.services import get_branch_stocks, update_branch_stock_on_order_statuses
 from settings.models import Branch
 
 
@@ -22,6 +25,12 @@ def is_valid_uuid(val):
         return False
 
 
+def normalize_uuid(val):
+    if is_valid_uuid(val):
+        return str(uuid.UUID(str(val)))
+    return None
+
+
 def get_object_or_none(classmodel, **kwargs):
     try:
         return classmodel.objects.get(**kwargs)
@@ -112,28 +121,39 @@ def process_order_request(request):
     return data
 
 
+def get_order_variants(details):
+    variant_ids = {normalize_uuid(detail.get("variant")) for detail in details} - {None}
+    if not variant_ids:
+        return {}
+
+    return {
+        str(variant.variant_id): variant
+        for variant in ProductVariant.objects.select_related("price").filter(variant_id__in=variant_ids)
+    }
+
+
 def process_order_details(details, order_amount, has_valid_code, total_discount):
+    variants = get_order_variants(details)
     new_details = []
     for detail in details:
         new_detail = {}
-        variant = get_object_or_none(ProductVariant, variant_id=detail.get("variant", None))
+        variant = variants.get(normalize_uuid(detail.get("variant")))
         if variant:
+            quantity = detail.get("quantity", 0)
             new_detail["product_variant"] = variant.pk
-            new_detail["quantity"] = detail.get("quantity", 0)
+            new_detail["quantity"] = quantity
             new_detail["amount"] = variant.price.base_price
             new_detail["discount"] = 0
-            new_detail["total_amount"] = variant.price.base_price * detail.get("quantity", 0)
+            new_detail["total_amount"] = variant.price.base_price * quantity
 
             order_amount += new_detail.get("total_amount")
 
             if has_valid_code:
                 new_detail["discount"] = variant.price.discounted_price
-                total_discount += (variant.price.base_price * new_detail.get("quantity", 0)) - (
-                    variant.price.discounted_price * new_detail.get("quantity", 0)
-                )
+                total_discount += (variant.price.base_price * quantity) - (variant.price.discounted_price * quantity)
         new_details.append(new_detail)
-    else:
-        return new_details, order_amount, total_discount
+
+    return new_details, order_amount, total_discount
 
 
 def process_fees_details(fees, total_fees, has_valid_code, total_discount, order_type):
@@ -166,9 +186,10 @@ def check_order_stocks(request):
     has_no_stock = False
 
     if order:
-        details = order.details.all()
+        details = order.details.select_related("product_variant")
+        stocks = get_branch_stocks(request.data["branch_id"], [detail.product_variant_id for detail in details])
         for detail in details:
-            variant_stock = detail.product_variant.get_total_quantity_by_branch(branch_id=request.data["branch_id"])
+            variant_stock = stocks.get(detail.product_variant_id, 0)
 
             order_stock = variant_stock - detail.quantity
             if order_stock > 0:
@@ -212,7 +233,7 @@ def process_attachments(order, request):
     return has_failed_upload
 
 
-def notify_customer_on_order_update_by_email(order):
+def get_order_update_email_payload(order):
     serialized_order = OrderInfoSerializer(order)
 
     if serialized_order:
@@ -239,24 +260,40 @@ def notify_customer_on_order_update_by_email(order):
                 },
             )
 
-            return construct_and_send_email_payload(email_subject, email_body, email_address)
+            return email_subject, email_body, email_address
+
+    return None
+
+
+def notify_customer_on_order_update_by_email(order):
+    payload = get_order_update_email_payload(order)
+    if payload:
+        return queue_email_payload(*payload)
 
     return None
 
 
+def has_exclusive_product_variant(order, registration_tag):
+    for details in order.details.all():
+        if details.product_variant_id is None:
+            continue
+        for tag in details.product_variant.variant_tags or []:
+            if str(tag) == registration_tag:
+                return True
+    return False
+
+
 def check_for_exclusive_product_variant(order_history):
     order = get_object_or_404(Order, id=order_history.order.pk)
     registration_tag = str(get_setting(Settings.REGISTRATION_TAG))
-    for details in order.details.all():
-        for tag in details.product_variant.variant_tags:
-            if str(tag) == registration_tag:
-                return notify_customer_on_registration_by_email(order)
+    if has_exclusive_product_variant(order, registration_tag):
+        return notify_customer_on_registration_by_email(order)
 
 
-def notify_customer_on_registration_by_email(order):
+def get_registration_email_payload(order):
     registration_obj = create_registration_object(order)
     if not registration_obj:
-        return "Unable to send Registration Email"
+        return None
 
     serialized_order = OrderInfoSerializer(order)
 
@@ -284,7 +321,17 @@ def notify_customer_on_registration_by_email(order):
                 },
             )
 
-            return construct_and_send_email_payload(email_subject, email_body, email_address)
+            return email_subject, email_body, email_address
+
+    return None
+
+
+def notify_customer_on_registration_by_email(order):
+    payload = get_registration_email_payload(order)
+    if not payload:
+        return "Unable to send Registration Email"
+
+    return queue_email_payload(*payload)
 
 
 def create_registration_object(order):
@@ -298,3 +345,154 @@ def create_registration_object(order):
     signed_obj = signer.sign_object(data)
 
     return signed_obj
+
+
+def rebuild_order_current_statuses():
+    latest_histories = OrderHistory.objects.filter(order=OuterRef("pk")).order_by("-created")
+    orders = Order.objects.annotate(
+        latest_status=Subquery(latest_histories.values("order_status")[:1]),
+        latest_created=Subquery(latest_histories.values("created")[:1]),
+    ).only("id")
+
+    updated_orders = []
+    for order in orders.iterator():
+        order.current_status = order.latest_status
+        order.current_stage = OrderHistory(order_status=order.latest_status).get_order_status_stage()
+        order.status_changed_at = order.latest_created
+        updated_orders.append(order)
+
+    Order.objects.bulk_update(updated_orders, ["current_status", "current_stage", "status_changed_at"], batch_size=500)
+
+    return len(updated_orders)
+
+
+def snapshot_orders_details(orders):
+    details = (
+        OrderDetail.objects.filter(order__in=orders, product_variant__isnull=False, pricing_snapshot__isnull=True)
+        .select_related("product_variant__price")
+        .prefetch_related(
+            Prefetch("product_variant__point_values", queryset=PointValue.objects.select_related("membership_level"))
+        )
+    )
+
+    snapshot_details = []
+    for detail in details:
+        detail.pricing_snapshot = detail.get_pricing_snapshot()
+        snapshot_details.append(detail)
+
+    OrderDetail.objects.bulk_update(snapshot_details, ["pricing_snapshot"], batch_size=500)
+
+    return snapshot_details
+
+
+def snapshot_order_details(order):
+    return snapshot_orders_details([order])
+
+
+def get_excluded_order_statuses(order_type):
+    match order_type:
+        case OrderType.PICKUP:
+            return [OrderStatus.AWAITING_DELIVERY, OrderStatus.ON_DELIVERY]
+        case OrderType.DELIVERY:
+            return [OrderStatus.AWAITING_PICKUP, OrderStatus.ON_PICKUP]
+    return []
+
+
+def process_bulk_order_history_request(request):
+    order_status = request.data.get("order_status")
+    if order_status not in OrderStatus.values:
+        return [], ["Invalid Order Status."]
+
+    order_ids = list(
+        dict.fromkeys(normalize_uuid(order_id) or str(order_id) for order_id in request.data.get("order_ids") or [])
+    )
+    if not order_ids:
+        return [], ["No Orders selected."]
+
+    orders = list(
+        Order.objects.filter(order_id__in=[order_id for order_id in order_ids if is_valid_uuid(order_id)])
+        .select_related("account__user", "customer", "promo_code__account")
+        .order_by("id")
+    )
+    existing_order_ids = {str(order.order_id) for order in orders}
+    errors = ["Order %s does not exist." % (order_id) for order_id in order_ids if order_id not in existing_order_ids]
+    for order in orders:
+        if order.current_status == order_status:
+            errors.append("Order #%s is already %s." % (order.get_order_number(), order_status))
+        elif order_status in get_excluded_order_statuses(order.order_type):
+            errors.append("Order #%s cannot be set to %s." % (order.get_order_number(), order_status))
+
+    return orders, errors
+
+
+def create_bulk_order_histories(request, orders):
+    order_status = request.data.get("order_status")
+    created_by = request.user if request.user.is_authenticated else None
+    email_sent = request.data.get("email_sent", True)
+    messages = []
+
+    with transaction.atomic():
+        previous_statuses = dict(
+            Order.objects.select_for_update()
+            .filter(pk__in=[order.pk for order in orders])
+            .values_list("pk", "current_status")
+        )
+        histories = OrderHistory.objects.bulk_create(
+            [
+                OrderHistory(
+                    order=order,
+                    order_status=order_status,
+                    comment=request.data.get("comment"),
+                    email_sent=email_sent,
+                    created_by=created_by,
+                )
+                for order in orders
+            ]
+        )
+        current = {
+            "current_status": order_status,
+            "current_stage": histories[0].get_order_status_stage(),
+            "status_changed_at": histories[0].created,
+        }
+        Order.objects.filter(pk__in=previous_statuses.keys()).update(**current)
+        for order in orders:
+            for field, value in current.items():
+                setattr(order, field, value)
+
+        update_branch_stock_on_order_statuses(orders, previous_statuses, order_status)
+
+        if order_status == OrderStatus.COMPLETED:
+            completed_orders = [order for order in orders if previous_statuses[order.pk] != OrderStatus.COMPLETED]
+            snapshot_orders_details(completed_orders)
+            comp_plan_orders(request, completed_orders)
+
+            registration_tag = str(get_setting(Settings.REGISTRATION_TAG))
+            prefetch_related_objects(completed_orders, "details__product_variant")
+            registration_orders = [
+                order for order in completed_orders if has_exclusive_product_variant(order, registration_tag)
+            ]
+        else:
+            registration_orders = []
+
+        if email_sent or registration_orders:
+            prefetch_related_objects(
+                orders,
+                "histories__created_by",
+                "attachments",
+                "details",
+                "fees",
+                "address",
+                "account__contact_info",
+            )
+
+        payloads = []
+        if email_sent:
+            payloads.extend(get_order_update_email_payload(order) for order in orders)
+        for order in registration_orders:
+            payload = get_registration_email_payload(order)
+            if not payload:
+                messages.append("Unable to send Registration Email for Order #%s." % (order.get_order_number()))
+            payloads.append(payload)
+        queue_email_payloads(payloads)
+
+    return histories, messages
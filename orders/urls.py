@@ -10,6 +10,7 @@ from orders.api import (
     GetOrderStatusView,
     VerifyOrderStocksView,
     CreateOrderHistoryView,
+    BulkCreateOrderHistoryView,
 )
 from django.urls import path
 
@@ -28,6 +29,7 @@ urlpatterns = [
     path("admin/getorderstatus/", GetOrderStatusView.as_view()),
     path("admin/verifyorderstocks/", VerifyOrderStocksView.as_view()),
     path("admin/updateorder/", CreateOrderHistoryView.as_view()),
+    path("admin/updateorders/", BulkCreateOrderHistoryView.as_view()),
 ]
 
 urlpatterns += router.urls
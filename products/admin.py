@@ -13,6 +13,7 @@ from products.models import (
     Supply,
     SupplyDetail,
     SupplyHistory,
+    BranchStock,
 )
 
 admin.site.register(ProductType, SimpleHistoryAdmin)
@@ -27,3 +28,4 @@ admin.site.register(PointValue, SimpleHistoryAdmin)
 admin.site.register(Supply, SimpleHistoryAdmin)
 admin.site.register(SupplyDetail, SimpleHistoryAdmin)
 admin.site.register(SupplyHistory, SimpleHistoryAdmin)
+admin.site.register(BranchStock)
@@ -1,5 +1,5 @@
 from decimal import Decimal
-from django.db.models import Prefetch, Q, Sum, Max, F
+from django.db.models import Prefetch, Q, Sum
 from rest_framework import status, views, permissions
 from rest_framework.parsers import MultiPartParser
 from rest_framework.viewsets import ModelViewSet
@@ -38,15 +38,20 @@ from products.serializers import (
     ShopProductTypesSerializer,
 )
 from products.services import (
+    annotate_branch_stock,
     create_supply_initial_history,
     create_supply_status_filter,
     create_variant_initial_supply,
+    get_shop_product_types_data,
+    get_shop_product_variants_data,
+    get_shop_products_data,
     notify_branch_to_on_supply_update_by_email,
     process_media,
     process_supply_history_request,
     process_supply_request,
     transform_form_data_to_json,
     transform_variant_form_data_to_json,
+    update_branch_stock_on_supply_status,
     verify_product_name,
     verify_product_slug,
     verify_product_type_name,
@@ -55,6 +60,7 @@ from products.services import (
     verify_product_variant_slug,
 )
 from settings.models import Branch
+from vanguard.caching import CatalogSnapshotMixin
 from vanguard.permissions import IsDeveloperUser, IsAdminUser, IsStaffUser
 from vanguard.throttle import DevTestingAnonThrottle
 
@@ -143,7 +149,7 @@ class ProductVariantsListViewSet(ModelViewSet):
 
     def get_queryset(self):
         branch_id = self.request.query_params.get("branch_id", None)
-        return ProductVariant.objects.all().order_by("product")
+        return annotate_branch_stock(ProductVariant.objects.all(), branch_id).order_by("product")
 
 
 class ProductVariantInfoViewSet(ModelViewSet):
@@ -162,11 +168,8 @@ class ProductVariantInfoViewSet(ModelViewSet):
                 .prefetch_related(
                     Prefetch(
                         "supplies",
-                        SupplyDetail.objects.annotate(latest_supply_status=Max("supply__histories__created"))
-                        .filter(supply__branch_to__branch_id=branch_id)
-                        .filter(
-                            supply__histories__created=F("latest_supply_status"),
-                            supply__histories__supply_status=SupplyStatus.DELIVERED,
+                        SupplyDetail.objects.filter(
+                            supply__branch_to__branch_id=branch_id, supply__current_status=SupplyStatus.DELIVERED
                         ),
                     ),
                     Prefetch(
@@ -478,7 +481,8 @@ class CreateSupplyView(views.APIView):
         processed_request["histories"] = create_supply_initial_history(request.data)
         serializer = SupplyUpdateCreateSerializer(data=processed_request)
         if serializer.is_valid():
-            serializer.save()
+            created_supply = serializer.save()
+            update_branch_stock_on_supply_status(created_supply.histories.latest("created"))
             return Response(data={"detail": "Supply Request created."}, status=status.HTTP_201_CREATED)
         else:
             print(serializer.errors)
@@ -514,6 +518,7 @@ class CreateSupplyHistoryView(views.APIView):
             serializer = CreateSupplyHistorySerializer(data=processed_supply_history)
             if serializer.is_valid():
                 created_supply_history = serializer.save()
+                update_branch_stock_on_supply_status(created_supply_history)
                 email_msg = None
                 if created_supply_history.email_sent:
                     email_msg = notify_branch_to_on_supply_update_by_email(created_supply_history.supply.pk)
@@ -556,7 +561,21 @@ class GetSupplyStatusView(views.APIView):
 
 
 # Front End
-class ShopProductTypesListViewSet(ModelViewSet):
+class ShopCatalogListMixin:
+    def get_catalog_data(self, queryset):
+        return self.get_serializer(queryset, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            queryset = queryset.filter(pk__in=[obj.pk for obj in page])
+            return self.get_paginated_response(self.get_catalog_data(queryset))
+
+        return Response(self.get_catalog_data(queryset))
+
+
+class ShopProductTypesListViewSet(CatalogSnapshotMixin, ShopCatalogListMixin, ModelViewSet):
     queryset = ProductType.objects.all()
     serializer_class = ShopProductTypesSerializer
     permission_classes = []
@@ -575,8 +594,11 @@ class ShopProductTypesListViewSet(ModelViewSet):
             .order_by("-id")
         )
 
+    def get_catalog_data(self, queryset):
+        return get_shop_product_types_data(queryset, self.request)
 
-class ShopProductTypeViewSet(ModelViewSet):
+
+class ShopProductTypeViewSet(CatalogSnapshotMixin, ModelViewSet):
     queryset = ProductType.objects.all()
     serializer_class = ShopProductTypesSerializer
     permission_classes = []
@@ -598,7 +620,7 @@ class ShopProductTypeViewSet(ModelViewSet):
             )
 
 
-class ShopProductsListViewSet(ModelViewSet):
+class ShopProductsListViewSet(CatalogSnapshotMixin, ShopCatalogListMixin, ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ShopProductsSerializer
     permission_classes = []
@@ -611,14 +633,20 @@ class ShopProductsListViewSet(ModelViewSet):
             .prefetch_related(
                 Prefetch(
                     "product_variants",
-                    queryset=ProductVariant.objects.filter(variant_status=Status.ACTIVE).order_by("-id"),
+                    queryset=annotate_branch_stock(
+                        ProductVariant.objects.filter(variant_status=Status.ACTIVE),
+                        self.request.query_params.get("branch_id", None),
+                    ).order_by("-id"),
                 )
             )
             .order_by("-id")
         )
 
+    def get_catalog_data(self, queryset):
+        return get_shop_products_data(queryset, self.request)
+
 
-class ShopProductViewSet(ModelViewSet):
+class ShopProductViewSet(CatalogSnapshotMixin, ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ShopProductsSerializer
     permission_classes = []
@@ -635,14 +663,17 @@ class ShopProductViewSet(ModelViewSet):
                 .prefetch_related(
                     Prefetch(
                         "product_variants",
-                        queryset=ProductVariant.objects.filter(variant_status=Status.ACTIVE).order_by("-id"),
+                        queryset=annotate_branch_stock(
+                            ProductVariant.objects.filter(variant_status=Status.ACTIVE),
+                            self.request.query_params.get("branch_id", None),
+                        ).order_by("-id"),
                     )
                 )
                 .order_by("-id")
             )
 
 
-class ShopProductsVariantsListViewSet(ModelViewSet):
+class ShopProductsVariantsListViewSet(CatalogSnapshotMixin, ShopCatalogListMixin, ModelViewSet):
     queryset = ProductVariant.objects.all()
     serializer_class = ShopProductsVariantsSerializer
     permission_classes = []
@@ -651,14 +682,20 @@ class ShopProductsVariantsListViewSet(ModelViewSet):
 
     def get_queryset(self):
         branch_id = self.request.query_params.get("branch_id", None)
-        return ProductVariant.objects.filter(
-            variant_status=Status.ACTIVE,
-            product__product_status=Status.ACTIVE,
-            product__product_type__product_type_status=Status.ACTIVE,
+        return annotate_branch_stock(
+            ProductVariant.objects.filter(
+                variant_status=Status.ACTIVE,
+                product__product_status=Status.ACTIVE,
+                product__product_type__product_type_status=Status.ACTIVE,
+            ),
+            branch_id,
         ).order_by("-id")
 
+    def get_catalog_data(self, queryset):
+        return get_shop_product_variants_data(queryset, self.request)
+
 
-class ShopProductsVariantViewSet(ModelViewSet):
+class ShopProductsVariantViewSet(CatalogSnapshotMixin, ModelViewSet):
     queryset = ProductVariant.objects.all()
     serializer_class = ShopProductsVariantsSerializer
     permission_classes = []
@@ -669,9 +706,12 @@ class ShopProductsVariantViewSet(ModelViewSet):
         branch_id = self.request.query_params.get("branch_id", None)
         slug = self.request.query_params.get("slug", None)
         if slug:
-            return ProductVariant.objects.filter(
-                variant_status=Status.ACTIVE,
-                product__product_status=Status.ACTIVE,
-                product__product_type__product_type_status=Status.ACTIVE,
-                meta__page_slug=slug,
+            return annotate_branch_stock(
+                ProductVariant.objects.filter(
+                    variant_status=Status.ACTIVE,
+                    product__product_status=Status.ACTIVE,
+                    product__product_type__product_type_status=Status.ACTIVE,
+                    meta__page_slug=slug,
+                ),
+                branch_id,
             ).order_by("-id")
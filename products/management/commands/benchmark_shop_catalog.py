@@ -0,0 +1,63 @@
+import time
+from django.db import connection
+from django.core.management.base import BaseCommand
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from products.api import ShopProductTypesListViewSet, ShopProductsListViewSet, ShopProductsVariantsListViewSet
+
+
+class Command(BaseCommand):
+    help = "Compare the shop catalog fast path against the ModelSerializer output, time and query count"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch-id", default=None)
+        parser.add_argument("--iterations", type=int, default=10)
+
+    def run(self, render, iterations):
+        with CaptureQueriesContext(connection) as queries:
+            content = render()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            render()
+        return content, len(queries), (time.perf_counter() - start) * 1000 / iterations
+
+    def handle(self, *args, **options):
+        params = {"branch_id": options["branch_id"]} if options["branch_id"] else {}
+        request = Request(APIRequestFactory().get("/", params))
+        renderer = JSONRenderer()
+
+        has_mismatch = False
+        for view_class in (ShopProductTypesListViewSet, ShopProductsListViewSet, ShopProductsVariantsListViewSet):
+            view = view_class(request=request, format_kwarg=None, kwargs={})
+
+            def render_serializer():
+                serializer = view.get_serializer(view.get_queryset(), many=True)
+                return renderer.render(serializer.data)
+
+            def render_catalog():
+                return renderer.render(view.get_catalog_data(view.get_queryset().prefetch_related(None)))
+
+            serializer_content, serializer_queries, serializer_ms = self.run(render_serializer, options["iterations"])
+            catalog_content, catalog_queries, catalog_ms = self.run(render_catalog, options["iterations"])
+
+            is_identical = serializer_content == catalog_content
+            has_mismatch = has_mismatch or not is_identical
+            self.stdout.write(
+                "%s: serializer %s queries %.2fms, fast path %s queries %.2fms, %s bytes %s"
+                % (
+                    view_class.__name__,
+                    serializer_queries,
+                    serializer_ms,
+                    catalog_queries,
+                    catalog_ms,
+                    len(catalog_content),
+                    "identical" if is_identical else "MISMATCH",
+                )
+            )
+
+        if has_mismatch:
+            self.stdout.write(self.style.ERROR("Fast path output differs from the serializers."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Fast path output is identical to the serializers."))
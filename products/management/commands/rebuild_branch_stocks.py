@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.services import rebuild_branch_stocks
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-branch stock table from Supply and Order histories"
+
+    def handle(self, *args, **options):
+        stocks = rebuild_branch_stocks()
+        self.stdout.write(self.style.SUCCESS("Rebuilt %s branch stocks." % (stocks)))
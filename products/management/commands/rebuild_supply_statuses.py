@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.services import rebuild_supply_current_statuses
+
+
+class Command(BaseCommand):
+    help = "Recompute the current status columns of Supplies from their latest Supply History"
+
+    def handle(self, *args, **options):
+        supplies = rebuild_supply_current_statuses()
+        self.stdout.write(self.style.SUCCESS("Rebuilt current status of %s supplies." % (supplies)))
@@ -1,10 +1,9 @@
 import uuid
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
-from django.db.models import Sum, Max, F, Prefetch
+from django.db.models import Sum, Prefetch
 from django.db.models.functions import Coalesce
 from simple_history.models import HistoricalRecords
-from orders.enums import OrderStatus
 from orders.models import OrderDetail
 from products.enums import Status, SupplyStatus
 
@@ -279,27 +278,10 @@ class ProductVariant(models.Model):
         return self.supplies.aggregate(current_stock=Coalesce(Sum("quantity"), 0)).get("current_stock")
 
     def get_total_quantity_by_branch(self, branch_id=None):
-        orders = (
-            self.orders.filter(order__branch__branch_id=branch_id)
-            .filter(
-                order__histories__order_status=OrderStatus.COMPLETED,
-            )
-            .aggregate(current_stock=Coalesce(Sum("quantity"), 0))
-            .get("current_stock")
-        )
-
-        supplies = (
-            self.supplies.annotate(latest_supply_status=Max("supply__histories__created"))
-            .filter(supply__branch_to__branch_id=branch_id)
-            .filter(
-                supply__histories__created=F("latest_supply_status"),
-                supply__histories__supply_status=SupplyStatus.DELIVERED,
-            )
-            .aggregate(current_stock=Coalesce(Sum("quantity"), 0))
-            .get("current_stock")
-        )
+        if hasattr(self, "branch_stock"):
+            return self.branch_stock
 
-        return supplies - orders
+        return self.branch_stocks.filter(branch__branch_id=branch_id).values_list("quantity", flat=True).first() or 0
 
     class Meta:
         ordering = ["-variant_id"]
@@ -464,6 +446,14 @@ class Supply(models.Model):
         null=True,
         blank=True,
     )
+    current_status = models.CharField(
+        max_length=255,
+        choices=SupplyStatus.choices,
+        null=True,
+        blank=True,
+    )
+    current_stage = models.PositiveSmallIntegerField(null=True, blank=True)
+    status_changed_at = models.DateTimeField(blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
         "users.User",
@@ -488,32 +478,20 @@ class Supply(models.Model):
     def _history_user(self, value):
         self.modified_by = value
 
+    class Meta:
+        indexes = [
+            models.Index(fields=("branch_to", "current_status")),
+            models.Index(fields=("branch_from", "current_status")),
+        ]
+
     def get_supply_number(self):
         return str(self.id).zfill(5)
 
     def get_last_supply_status(self):
-        try:
-            return self.histories.latest("created").supply_status
-        except:
-            return None
+        return self.current_status
 
     def get_last_supply_stage(self):
-        try:
-            match self.histories.latest("created").supply_status:
-                case SupplyStatus.PENDING:
-                    return 1
-                case SupplyStatus.REQUEST_RECEIVED | SupplyStatus.BACK_ORDERED:
-                    return 2
-                case SupplyStatus.PREPARING:
-                    return 3
-                case SupplyStatus.IN_TRANSIT:
-                    return 4
-                case SupplyStatus.DELIVERED | SupplyStatus.DENIED | SupplyStatus.CANCELLED:
-                    return 5
-                case _:
-                    None
-        except:
-            return None
+        return self.current_stage
 
     def get_can_update_supply_status(self, branch_id=None):
         if str(self.branch_from.branch_id) == branch_id and str(self.branch_to.branch_id) == branch_id:
@@ -610,6 +588,23 @@ class SupplyHistory(models.Model):
     def _history_user(self, value):
         self.modified_by = value
 
+    def save(self, *args, **kwargs):
+        is_created = self._state.adding
+        super().save(*args, **kwargs)
+        if is_created and self.supply_id:
+            self.set_as_current_status()
+
+    def set_as_current_status(self):
+        current = {
+            "current_status": self.supply_status,
+            "current_stage": self.get_supply_status_stage(),
+            "status_changed_at": self.created,
+        }
+        Supply.objects.filter(pk=self.supply_id).update(**current)
+        if SupplyHistory.supply.is_cached(self):
+            for field, value in current.items():
+                setattr(self.supply, field, value)
+
     def get_supply_status_stage(self):
         match self.supply_status:
             case SupplyStatus.PENDING:
@@ -644,3 +639,18 @@ class SupplyHistory(models.Model):
 
     def __str__(self):
         return "%s - %s" % (self.supply, self.supply_status)
+
+
+class BranchStock(models.Model):
+    branch = models.ForeignKey("settings.Branch", on_delete=models.CASCADE, related_name="stocks")
+    variant = models.ForeignKey("products.ProductVariant", on_delete=models.CASCADE, related_name="branch_stocks")
+    quantity = models.IntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["branch", "variant"], name="one_stock_per_branch_variant"),
+        ]
+
+    def __str__(self):
+        return "%s : %s - %s" % (self.branch, self.variant, self.quantity)
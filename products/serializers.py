@@ -2,7 +2,7 @@ from django.forms.models import model_to_dict
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 from core.enums import Settings
-from core.services import get_setting
+from core.services import get_int_setting
 from orders.serializers import ProductVariantOrderDetailsSerializer
 from products.models import (
     Product,
@@ -21,39 +21,43 @@ from products.models import (
 from settings.serializers import BranchInfoSerializer
 
 
-class HistoricalRecordField(serializers.ListField):
-    def to_representation(self, instance):
-        histories = instance.all()
-        old_record = None
-        historical_data = []
-        for history in histories.iterator():
-            data = {}
-            changes = []
-            if old_record is None:
-                old_record = history
-            else:
-                delta = old_record.diff_against(history)
-                for change in delta.changes:
-                    changes.append(
-                        "{} changed from {} to {}".format(
-                            change.field, change.old if change.old else "None", change.new if change.new else "None"
-                        )
+def get_historical_records_data(histories):
+    old_record = None
+    historical_data = []
+    for history in histories:
+        data = {}
+        changes = []
+        if old_record is None:
+            old_record = history
+        else:
+            delta = old_record.diff_against(history)
+            for change in delta.changes:
+                changes.append(
+                    "{} changed from {} to {}".format(
+                        change.field, change.old if change.old else "None", change.new if change.new else "None"
                     )
-                old_record = history
+                )
+            old_record = history
 
-            data["modified"] = history.modified
-            if history.modified_by:
-                data["modified_by"] = history.modified_by.username
-            else:
-                data["modified_by"] = None
+        data["modified"] = history.modified
+        if history.modified_by:
+            data["modified_by"] = history.modified_by.username
+        else:
+            data["modified_by"] = None
 
-            if len(changes) > 0:
-                data["changes"] = changes
-            else:
-                data["changes"] = None
+        if len(changes) > 0:
+            data["changes"] = changes
+        else:
+            data["changes"] = None
+
+        historical_data.append(data)
 
-            historical_data.append(data)
+    return historical_data
 
+
+class HistoricalRecordField(serializers.ListField):
+    def to_representation(self, instance):
+        historical_data = get_historical_records_data(instance.all().iterator())
         return super().to_representation(historical_data)
 
 
@@ -338,7 +342,7 @@ class ProductVariantsListSerializer(ModelSerializer):
     def to_representation(self, instance):
         request = self.context["request"]
         branch_id = request.query_params["branch_id"]
-        low_stock_alert_quantity = int(get_setting(Settings.LOW_STOCK_ALERT_QUANTITY))
+        low_stock_alert_quantity = get_int_setting(Settings.LOW_STOCK_ALERT_QUANTITY)
         stocks = instance.get_total_quantity_by_branch(branch_id=branch_id)
         stocks_status = None
         if stocks > low_stock_alert_quantity:
@@ -1,10 +1,19 @@
 import json
+from collections import defaultdict
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
+from rest_framework import serializers
 from core.enums import Settings
 from core.services import get_setting
-from emails.services import construct_and_send_email_payload, render_template
-from products.enums import SupplyStatus
+from emails.services import queue_email_payload, render_template
+from orders.enums import OrderStatus
+from orders.models import OrderDetail
+from products.enums import Status, SupplyStatus
 from products.models import (
+    BranchStock,
     Product,
     ProductMedia,
     ProductMeta,
@@ -13,9 +22,12 @@ from products.models import (
     ProductVariant,
     ProductVariantMeta,
     Supply,
+    SupplyDetail,
+    SupplyHistory,
 )
-from products.serializers import SupplyInfoEmailSerializer
+from products.serializers import SupplyInfoEmailSerializer, get_historical_records_data
 from settings.models import Branch
+from shop.services import bump_catalog_version
 
 
 def transform_form_data_to_json(request):
@@ -220,7 +232,7 @@ def notify_branch_to_on_supply_update_by_email(supply):
             },
         )
 
-        return construct_and_send_email_payload(email_subject, email_body, supply.branch_to.email_address)
+        return queue_email_payload(email_subject, email_body, supply.branch_to.email_address)
 
     return None
 
@@ -281,3 +293,302 @@ def verify_product_variant_slug(request):
     if queryset.exists():
         return False
     return True
+
+
+def apply_branch_stock_changes(changes):
+    for (branch_id, variant_id), quantity in changes.items():
+        if not quantity:
+            continue
+        stock, created = BranchStock.objects.get_or_create(branch_id=branch_id, variant_id=variant_id)
+        BranchStock.objects.filter(pk=stock.pk).update(quantity=F("quantity") + quantity)
+
+    if any(changes.values()):
+        transaction.on_commit(bump_catalog_version)
+
+
+def get_branch_stock_changes(branch_id, details, variant_field, sign):
+    changes = defaultdict(int)
+    for variant_id, quantity in details.values_list(variant_field, "quantity"):
+        if variant_id and quantity:
+            changes[(branch_id, variant_id)] += sign * quantity
+
+    return changes
+
+
+def update_branch_stock_on_supply_status(supply_history):
+    supply = supply_history.supply
+    previous_history = supply.histories.exclude(pk=supply_history.pk).order_by("-created").first()
+    was_delivered = previous_history is not None and previous_history.supply_status == SupplyStatus.DELIVERED
+    is_delivered = supply_history.supply_status == SupplyStatus.DELIVERED
+
+    if was_delivered == is_delivered or supply.branch_to_id is None:
+        return
+
+    with transaction.atomic():
+        apply_branch_stock_changes(
+            get_branch_stock_changes(supply.branch_to_id, supply.details, "variant_id", 1 if is_delivered else -1)
+        )
+
+
+def update_branch_stock_on_order_status(order_history):
+    order = order_history.order
+    previous_history = order.histories.exclude(pk=order_history.pk).order_by("-created").first()
+    was_completed = previous_history is not None and previous_history.order_status == OrderStatus.COMPLETED
+    is_completed = order_history.order_status == OrderStatus.COMPLETED
+
+    if was_completed == is_completed or order.branch_id is None:
+        return
+
+    with transaction.atomic():
+        apply_branch_stock_changes(
+            get_branch_stock_changes(order.branch_id, order.details, "product_variant_id", -1 if is_completed else 1)
+        )
+
+
+def update_branch_stock_on_order_statuses(orders, previous_statuses, order_status):
+    is_completed = order_status == OrderStatus.COMPLETED
+    changed_order_ids = [
+        order.pk
+        for order in orders
+        if order.branch_id is not None and (previous_statuses.get(order.pk) == OrderStatus.COMPLETED) != is_completed
+    ]
+    if not changed_order_ids:
+        return
+
+    sign = -1 if is_completed else 1
+    changes = defaultdict(int)
+    for branch_id, variant_id, quantity in OrderDetail.objects.filter(order_id__in=changed_order_ids).values_list(
+        "order__branch_id", "product_variant_id", "quantity"
+    ):
+        if variant_id and quantity:
+            changes[(branch_id, variant_id)] += sign * quantity
+
+    with transaction.atomic():
+        apply_branch_stock_changes(changes)
+
+
+def annotate_branch_stock(queryset, branch_id):
+    return queryset.annotate(
+        branch_stock=Coalesce(
+            Subquery(
+                BranchStock.objects.filter(branch__branch_id=branch_id, variant=OuterRef("pk")).values("quantity")[:1]
+            ),
+            0,
+        )
+    )
+
+
+def get_branch_stocks(branch_id, variant_ids):
+    return dict(
+        BranchStock.objects.filter(branch__branch_id=branch_id, variant_id__in=variant_ids).values_list(
+            "variant_id", "quantity"
+        )
+    )
+
+
+def rebuild_branch_stocks():
+    changes = defaultdict(int)
+
+    for branch_id, variant_id, quantity in SupplyDetail.objects.filter(
+        supply__current_status=SupplyStatus.DELIVERED, supply__branch_to__isnull=False, variant__isnull=False
+    ).values_list("supply__branch_to_id", "variant_id", "quantity"):
+        changes[(branch_id, variant_id)] += quantity
+
+    for branch_id, variant_id, quantity in OrderDetail.objects.filter(
+        order__current_status=OrderStatus.COMPLETED, order__branch__isnull=False, product_variant__isnull=False
+    ).values_list("order__branch_id", "product_variant_id", "quantity"):
+        changes[(branch_id, variant_id)] -= quantity
+
+    with transaction.atomic():
+        BranchStock.objects.all().delete()
+        BranchStock.objects.bulk_create(
+            [
+                BranchStock(branch_id=branch_id, variant_id=variant_id, quantity=quantity)
+                for (branch_id, variant_id), quantity in changes.items()
+            ]
+        )
+        transaction.on_commit(bump_catalog_version)
+
+    return len(changes)
+
+
+def rebuild_supply_current_statuses():
+    latest_histories = SupplyHistory.objects.filter(supply=OuterRef("pk")).order_by("-created")
+    supplies = Supply.objects.annotate(
+        latest_status=Subquery(latest_histories.values("supply_status")[:1]),
+        latest_created=Subquery(latest_histories.values("created")[:1]),
+    ).only("id")
+
+    updated_supplies = []
+    for supply in supplies.iterator():
+        supply.current_status = supply.latest_status
+        supply.current_stage = SupplyHistory(supply_status=supply.latest_status).get_supply_status_stage()
+        supply.status_changed_at = supply.latest_created
+        updated_supplies.append(supply)
+
+    Supply.objects.bulk_update(
+        updated_supplies, ["current_status", "current_stage", "status_changed_at"], batch_size=500
+    )
+
+    return len(updated_supplies)
+
+
+catalog_decimal_field = serializers.DecimalField(decimal_places=2, max_digits=13)
+catalog_datetime_field = serializers.DateTimeField()
+
+
+def format_catalog_value(field, value):
+    if value is None:
+        return None
+    return field.to_representation(value)
+
+
+def get_catalog_file_url(request, name):
+    if not name:
+        return None
+    url = default_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def get_catalog_metas(model, owner_field, owner_ids):
+    metas = list(
+        model.objects.filter(**{"%s__in" % (owner_field): owner_ids}).values(
+            "id",
+            "meta_tag_title",
+            "meta_tag_description",
+            "page_slug",
+            "modified",
+            "%s_id" % (owner_field),
+            "modified_by_id",
+        )
+    )
+
+    histories = defaultdict(list)
+    for history in model.history.filter(id__in=[meta["id"] for meta in metas]).select_related("modified_by"):
+        histories[history.id].append(history)
+
+    data = {}
+    for meta in metas:
+        data[meta["%s_id" % (owner_field)]] = {
+            "id": meta["id"],
+            "history": get_historical_records_data(histories[meta["id"]]),
+            "meta_tag_title": meta["meta_tag_title"],
+            "meta_tag_description": meta["meta_tag_description"],
+            "page_slug": meta["page_slug"],
+            "modified": format_catalog_value(catalog_datetime_field, meta["modified"]),
+            owner_field: meta["%s_id" % (owner_field)],
+            "modified_by": meta["modified_by_id"],
+        }
+
+    return data
+
+
+def get_catalog_medias(request, variant_ids):
+    medias = (
+        ProductMedia.objects.filter(variant_id__in=variant_ids)
+        .values("id", "attachment", "is_default", "created", "modified", "variant_id")
+        .order_by("id")
+    )
+
+    data = defaultdict(list)
+    for media in medias:
+        data[media["variant_id"]].append(
+            {
+                "id": media["id"],
+                "attachment": get_catalog_file_url(request, media["attachment"]),
+                "is_default": media["is_default"],
+                "created": format_catalog_value(catalog_datetime_field, media["created"]),
+                "modified": format_catalog_value(catalog_datetime_field, media["modified"]),
+                "variant": media["variant_id"],
+            }
+        )
+
+    return data
+
+
+def get_catalog_variants(queryset, request):
+    variants = list(
+        queryset.values(
+            "id",
+            "product_id",
+            "variant_id",
+            "variant_name",
+            "variant_description",
+            "variant_image",
+            "sku",
+            "product__product_type__product_type",
+            "product__product_type__meta__page_slug",
+            "price__base_price",
+            "price__discounted_price",
+        )
+    )
+    variant_ids = [variant["id"] for variant in variants]
+    medias = get_catalog_medias(request, variant_ids)
+    metas = get_catalog_metas(ProductVariantMeta, "variant", variant_ids)
+
+    branch_id = request.query_params.get("branch_id", None)
+    stocks = get_branch_stocks(branch_id, variant_ids) if branch_id else {}
+
+    return [
+        (
+            variant["product_id"],
+            {
+                "product_type": variant["product__product_type__product_type"],
+                "product_type_slug": variant["product__product_type__meta__page_slug"],
+                "variant_id": str(variant["variant_id"]),
+                "variant_name": variant["variant_name"],
+                "variant_description": variant["variant_description"],
+                "variant_image": get_catalog_file_url(request, variant["variant_image"]),
+                "sku": variant["sku"],
+                "price": format_catalog_value(catalog_decimal_field, variant["price__base_price"]),
+                "discount": format_catalog_value(catalog_decimal_field, variant["price__discounted_price"]),
+                "media": medias[variant["id"]],
+                "meta": metas.get(variant["id"]),
+                "stocks": stocks.get(variant["id"], 0),
+            },
+        )
+        for variant in variants
+    ]
+
+
+def get_shop_product_variants_data(queryset, request):
+    return [variant for product_id, variant in get_catalog_variants(queryset, request)]
+
+
+def get_shop_products_data(queryset, request):
+    products = list(queryset.values("id", "product_name", "product_image", "product_description"))
+    product_ids = [product["id"] for product in products]
+    metas = get_catalog_metas(ProductMeta, "product", product_ids)
+
+    product_variants = defaultdict(list)
+    variants = ProductVariant.objects.filter(product_id__in=product_ids, variant_status=Status.ACTIVE).order_by("-id")
+    for product_id, variant in get_catalog_variants(variants, request):
+        product_variants[product_id].append(variant)
+
+    return [
+        {
+            "product_name": product["product_name"],
+            "product_image": get_catalog_file_url(request, product["product_image"]),
+            "product_description": product["product_description"],
+            "product_variants": product_variants[product["id"]],
+            "meta": metas.get(product["id"]),
+        }
+        for product in products
+    ]
+
+
+def get_shop_product_types_data(queryset, request):
+    product_types = list(queryset.values("id", "product_type", "product_type_image", "product_type_description"))
+    metas = get_catalog_metas(ProductTypeMeta, "product_type", [product_type["id"] for product_type in product_types])
+
+    return [
+        {
+            "product_type": product_type["product_type"],
+            "product_type_image": get_catalog_file_url(request, product_type["product_type_image"]),
+            "product_type_description": product_type["product_type_description"],
+            "meta": metas.get(product_type["id"]),
+        }
+        for product_type in product_types
+    ]
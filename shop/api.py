@@ -17,6 +17,7 @@ from shop.serializers import (
     ShopPageContentsSerializer,
 )
 from shop.services import transform_form_data_to_json
+from vanguard.caching import CatalogSnapshotMixin
 from vanguard.permissions import IsDeveloperUser, IsAdminUser, IsStaffUser
 from vanguard.throttle import DevTestingAnonThrottle
 from users.enums import ActionType
@@ -256,7 +257,7 @@ class UpdateSectionComponentView(views.APIView):
 
 
 # Front End
-class ShopPageContentsViewSet(ModelViewSet):
+class ShopPageContentsViewSet(CatalogSnapshotMixin, ModelViewSet):
     queryset = PageContent.objects.all()
     serializer_class = ShopPageContentsSerializer
     permission_classes = []
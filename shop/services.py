@@ -1,4 +1,10 @@
+import hashlib
 import json
+import time
+import uuid
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = "shop_catalog_version"
 
 
 def transform_form_data_to_json(request):
@@ -19,3 +25,21 @@ def transform_form_data_to_json(request):
                 data[key] = value
 
     return data
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = {"version": uuid.uuid4().hex, "modified": int(time.time())}
+        if not cache.add(CATALOG_VERSION_KEY, version, None):
+            version = cache.get(CATALOG_VERSION_KEY) or version
+
+    return version
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_VERSION_KEY, {"version": uuid.uuid4().hex, "modified": int(time.time())}, None)
+
+
+def get_catalog_snapshot_key(version, name, url):
+    return "shop_catalog_snapshot:%s:%s:%s" % (version["version"], name, hashlib.sha1(url.encode()).hexdigest())
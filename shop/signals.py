@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from products.models import (
+    Price,
+    PointValue,
+    Product,
+    ProductMedia,
+    ProductMeta,
+    ProductType,
+    ProductTypeMeta,
+    ProductVariant,
+    ProductVariantMeta,
+)
+from shop.models import PageComponent, PageContent, SectionComponent
+from shop.services import bump_catalog_version
+
+CATALOG_MODELS = (
+    ProductType,
+    ProductTypeMeta,
+    Product,
+    ProductMeta,
+    ProductVariant,
+    ProductVariantMeta,
+    ProductMedia,
+    Price,
+    PointValue,
+    PageContent,
+    PageComponent,
+    SectionComponent,
+)
+
+
+def bump_catalog_version_on_change(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+def connect_catalog_signals():
+    for model in CATALOG_MODELS:
+        post_save.connect(
+            bump_catalog_version_on_change, sender=model, dispatch_uid="catalog_save_%s" % (model.__name__)
+        )
+        post_delete.connect(
+            bump_catalog_version_on_change, sender=model, dispatch_uid="catalog_delete_%s" % (model.__name__)
+        )
@@ -135,6 +135,8 @@ class UserLogsViewSet(ModelViewSet):
     serializer_class = UserLogsSerializer
     permission_classes = [IsDeveloperUser | IsAdminUser | IsStaffUser | IsMemberUser]
     http_method_names = ["get"]
+    pagination_ordering = ("-id",)
+    pagination_offset = True
 
     def get_queryset(self):
         queryset = UserLogs.objects.order_by("-id")
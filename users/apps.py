@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.core.signals import request_finished
+        from users.audit import flush_user_logs
+
+        request_finished.connect(flush_user_logs, dispatch_uid="flush_user_logs")
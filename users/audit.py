@@ -0,0 +1,57 @@
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core import serializers
+from django.contrib.contenttypes.models import ContentType
+from users.models import UserLogs
+
+logger = logging.getLogger(__name__)
+
+content_types = {}
+pending_user_logs = []
+user_logs_state = {"flushed": time.monotonic()}
+user_logs_lock = threading.Lock()
+
+
+def get_content_type(model):
+    content_type = content_types.get(model)
+    if content_type is None:
+        content_type = ContentType.objects.get(model=model)
+        content_types[model] = content_type
+    return content_type
+
+
+def queue_user_log(log):
+    with user_logs_lock:
+        pending_user_logs.append(log)
+        if (
+            len(pending_user_logs) < settings.USER_LOGS_FLUSH_SIZE
+            and time.monotonic() - user_logs_state["flushed"] < settings.USER_LOGS_FLUSH_INTERVAL
+        ):
+            return
+
+    flush_user_logs()
+
+
+def flush_user_logs(**kwargs):
+    with user_logs_lock:
+        user_logs_state["flushed"] = time.monotonic()
+        if not pending_user_logs:
+            return 0
+        batch = list(pending_user_logs)
+        pending_user_logs.clear()
+
+    try:
+        logs = UserLogs.objects.bulk_create(batch)
+    except Exception:
+        logger.exception("Unable to create %s User Logs" % (len(batch)))
+        return 0
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Created User Logs: " + serializers.serialize("json", logs))
+    return len(logs)
+
+
+atexit.register(flush_user_logs)
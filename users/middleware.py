@@ -1,11 +1,10 @@
-import datetime
-from django.core.cache import cache
-from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
+from users.presence import record_presence
 
 
 class ActiveUserMiddleware(MiddlewareMixin):
-    def process_request(self, request):
-        current_user = request.user
-        now = datetime.datetime.now()
-        cache.set("seen_%s" % (current_user.username), now, settings.USER_LASTSEEN_TIMEOUT)
+    def process_response(self, request, response):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            record_presence(user.username)
+        return response
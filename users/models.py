@@ -2,7 +2,8 @@ import uuid
 import datetime
 from django.core.cache import cache
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import (
     AbstractUser,
     BaseUserManager,
@@ -15,6 +16,9 @@ from django.utils.translation import gettext_lazy as _
 from simple_history.models import HistoricalRecords
 from users.enums import ActionType
 
+USER_ROLE_VERSION_KEY = "user_role_version_%s"
+USER_TYPE_PERMISSION_VERSION_KEY = "user_type_permission_version_%s"
+
 
 def user_avatar_directory(instance, filename):
     return "users/{0}/avatar/{1}".format(instance.user_id, filename)
@@ -74,10 +78,15 @@ class UserType(models.Model):
     user_type_name = models.CharField(
         max_length=255,
     )
+    permission_version = models.PositiveIntegerField(default=1)
 
     def get_all_users_count(self):
         return self.users.all().count()
 
+    def bump_permission_version(self):
+        UserType.objects.filter(pk=self.pk).update(permission_version=F("permission_version") + 1)
+        transaction.on_commit(lambda: cache.delete(USER_TYPE_PERMISSION_VERSION_KEY % (self.user_type_name)))
+
     def __str__(self):
         return "%s" % (self.user_type_name)
 
@@ -118,6 +127,7 @@ class User(AbstractUser):
     user_type = models.ForeignKey(UserType, on_delete=models.CASCADE, related_name="users", blank=True, null=True)
     avatar = models.ImageField(blank=True, upload_to=user_avatar_directory)
     is_active = models.BooleanField(default=True)
+    role_version = models.PositiveIntegerField(default=1)
     created = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
         "self",
@@ -144,6 +154,29 @@ class User(AbstractUser):
         verbose_name = _("user")
         verbose_name_plural = _("users")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "user_type_id" in instance.__dict__ and "is_active" in instance.__dict__:
+            instance._loaded_role = (instance.user_type_id, instance.is_active)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        if fields is not None and getattr(self, "is_token_user", False):
+            fields = set(fields) | self.get_deferred_fields()
+        super().refresh_from_db(using=using, fields=fields)
+
+    def save(self, *args, **kwargs):
+        loaded_role = getattr(self, "_loaded_role", None)
+        if loaded_role is not None and loaded_role != (self.user_type_id, self.is_active):
+            self.role_version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = set(kwargs["update_fields"]) | {"role_version"}
+            transaction.on_commit(lambda: cache.delete(USER_ROLE_VERSION_KEY % (self.pk)))
+
+        super().save(*args, **kwargs)
+        self._loaded_role = (self.user_type_id, self.is_active)
+
     def __str__(self):
         if not self.username:
             return "%s" % (self.email_address)
@@ -0,0 +1,68 @@
+import atexit
+import datetime
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+PRESENCE_KEY = "seen_%s"
+
+pending_presence = {}
+presence_state = {"flushed": time.monotonic()}
+presence_lock = threading.Lock()
+
+
+def get_presence_key(username):
+    return PRESENCE_KEY % (username)
+
+
+def record_presence(username, seen=None):
+    if not username:
+        return
+
+    with presence_lock:
+        pending_presence[username] = seen or datetime.datetime.now()
+        if time.monotonic() - presence_state["flushed"] < settings.USER_PRESENCE_FLUSH_INTERVAL:
+            return
+
+    flush_presence()
+
+
+def flush_presence():
+    with presence_lock:
+        presence_state["flushed"] = time.monotonic()
+        if not pending_presence:
+            return 0
+        batch = {get_presence_key(username): seen for username, seen in pending_presence.items()}
+        pending_presence.clear()
+
+    cache.set_many(batch, settings.USER_LASTSEEN_TIMEOUT)
+    return len(batch)
+
+
+def get_last_seen_many(usernames):
+    usernames = [username for username in usernames if username]
+    cached = cache.get_many([get_presence_key(username) for username in usernames])
+    last_seen = {username: cached.get(get_presence_key(username)) for username in usernames}
+
+    with presence_lock:
+        for username in usernames:
+            if username in pending_presence:
+                last_seen[username] = pending_presence[username]
+
+    return last_seen
+
+
+def get_last_seen(username):
+    return get_last_seen_many([username]).get(username)
+
+
+def is_online(last_seen, now=None):
+    if not last_seen:
+        return False
+
+    now = now or datetime.datetime.now()
+    return now <= last_seen + datetime.timedelta(seconds=settings.USER_ONLINE_TIMEOUT)
+
+
+atexit.register(flush_presence)
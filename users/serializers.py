@@ -1,12 +1,11 @@
 from django.contrib.contenttypes.models import ContentType
+from django.db import models
 from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from settings.models import BranchAssignment, Branch
 from users.models import User, UserLogs, LogDetails, UserType, Module, Permission
-from django.core.cache import cache
-from django.conf import settings
-import datetime
+from users.presence import get_last_seen, get_last_seen_many, is_online
 
 
 class ResetPasswordSerializer(serializers.Serializer):
@@ -94,6 +93,17 @@ class UserLogsSerializer(ModelSerializer):
         fields = "__all__"
 
 
+class UsersPresenceListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        users = data.all() if isinstance(data, models.Manager) else data
+        users = list(users)
+        last_seen = get_last_seen_many([user.username for user in users])
+        for user in users:
+            user.last_seen = last_seen.get(user.username)
+
+        return super().to_representation(users)
+
+
 class UsersListSerializer(ModelSerializer):
     user_type_name = serializers.CharField(source="user_type.user_type_name", required=False)
     created_by_name = serializers.CharField(source="created_by.display_name", required=False)
@@ -103,21 +113,12 @@ class UsersListSerializer(ModelSerializer):
     last_seen = serializers.SerializerMethodField()
 
     def get_online(self, obj):
-        if obj.last_seen:
-            now = datetime.datetime.now()
-            delta = datetime.timedelta(seconds=settings.USER_ONLINE_TIMEOUT)
-            print(obj.last_seen)
-            if now > obj.last_seen + delta:
-                return False
-            else:
-                return True
-        else:
-            return False
+        return is_online(self.get_last_seen(obj))
 
     def get_last_seen(self, obj):
-        last_seen = cache.get("seen_%s" % obj.username)
-        obj.last_seen = last_seen
-        return last_seen
+        if not hasattr(obj, "last_seen"):
+            obj.last_seen = get_last_seen(obj.username)
+        return obj.last_seen
 
     class Meta:
         model = User
@@ -132,6 +133,7 @@ class UsersListSerializer(ModelSerializer):
             "last_seen",
             "online",
         ]
+        list_serializer_class = UsersPresenceListSerializer
 
 
 class UserInfoSerializer(ModelSerializer):
@@ -1,10 +1,10 @@
 import logging
 import json
-from django.core import serializers
-from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from users.models import User
 from settings.models import Branch, BranchAssignment
 from users.models import UserLogs, Permission, UserType, Module
+from users.audit import get_content_type, queue_user_log
 
 logger = logging.getLogger(__name__)
 
@@ -114,6 +114,8 @@ def update_role_permissions(request):
                 print(e)
                 raise e
 
+    user_type.bump_permission_version()
+
 
 def create_user_logs(
     user=None,
@@ -124,19 +126,13 @@ def create_user_logs(
     object_uuid=None,
     value_to_display=None,
 ):
-    content_type = ContentType.objects.get(model=content_type_model)
-
-    log = UserLogs.objects.create(
+    log = UserLogs(
         user=user,
         action_type=action_type,
-        content_type=content_type,
+        content_type=get_content_type(content_type_model),
         object_id=object_id,
         object_type=object_type,
         object_uuid=object_uuid,
         value_to_display=value_to_display,
     )
-
-    if log:
-        logger.info("Created User Log: " + serializers.serialize("json", [log]))
-    else:
-        logger.error("Unable to create User Log")
+    transaction.on_commit(lambda: queue_user_log(log))
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from users.models import User, UserType, USER_ROLE_VERSION_KEY, USER_TYPE_PERMISSION_VERSION_KEY
+
+
+def set_role_claims(token, user):
+    token["name"] = user.username
+    token["email_address"] = user.email_address
+    token["user_type"] = user.user_type.user_type_name if user.user_type else None
+    token["role_version"] = user.role_version
+    token["permission_version"] = user.user_type.permission_version if user.user_type else None
+    return token
+
+
+def get_role_versions(user_id, user_type_name):
+    role_key = USER_ROLE_VERSION_KEY % (user_id)
+    permission_key = USER_TYPE_PERMISSION_VERSION_KEY % (user_type_name)
+    versions = cache.get_many([role_key, permission_key])
+
+    if role_key not in versions:
+        versions[role_key] = (
+            User.objects.filter(pk=user_id, is_active=True).values_list("role_version", flat=True).first()
+        )
+        cache.set(role_key, versions[role_key], settings.ROLE_VERSION_CACHE_TIMEOUT)
+
+    if permission_key not in versions:
+        versions[permission_key] = (
+            UserType.objects.filter(user_type_name=user_type_name).values_list("permission_version", flat=True).first()
+        )
+        cache.set(permission_key, versions[permission_key], settings.ROLE_VERSION_CACHE_TIMEOUT)
+
+    return versions[role_key], versions[permission_key]
+
+
+def get_token_user(validated_token):
+    claims = {
+        "id": validated_token[api_settings.USER_ID_CLAIM],
+        "username": validated_token.get("name"),
+        "email_address": validated_token.get("email_address"),
+        "is_active": True,
+        "role_version": validated_token.get("role_version"),
+    }
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in claims]
+    user = User.from_db(DEFAULT_DB_ALIAS, field_names, [claims[field_name] for field_name in field_names])
+    user.is_token_user = True
+    user.token_user_type = validated_token.get("user_type")
+    return user
+
+
+class RoleTokenAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if "role_version" not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        role_version, permission_version = get_role_versions(user_id, validated_token.get("user_type"))
+        if role_version is None or role_version != validated_token["role_version"]:
+            raise InvalidToken(_("Token role has changed"))
+        if permission_version != validated_token.get("permission_version"):
+            raise InvalidToken(_("Token permissions have changed"))
+
+        return get_token_user(validated_token)
@@ -0,0 +1,33 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from shop.services import get_catalog_snapshot_key, get_catalog_version
+
+
+class CatalogSnapshotMixin:
+    def list(self, request, *args, **kwargs):
+        version = get_catalog_version()
+        snapshot_key = get_catalog_snapshot_key(version, self.__class__.__name__, request.build_absolute_uri())
+        snapshot = cache.get(snapshot_key)
+        if snapshot is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            content = JSONRenderer().render(response.data)
+            snapshot = {"data": response.data, "etag": quote_etag(hashlib.sha1(content).hexdigest())}
+            cache.set(snapshot_key, snapshot, settings.CATALOG_SNAPSHOT_TIMEOUT)
+
+        response = Response(snapshot["data"])
+        response["ETag"] = snapshot["etag"]
+        response["Last-Modified"] = http_date(version["modified"])
+        patch_cache_control(response, public=True, no_cache=True)
+
+        return get_conditional_response(
+            request, etag=snapshot["etag"], last_modified=version["modified"], response=response
+        )
@@ -0,0 +1,63 @@
+import functools
+import hashlib
+import json
+from rest_framework import status
+from rest_framework.response import Response
+from core.services import claim_idempotency_key, complete_idempotency_key
+
+IDEMPOTENCY_KEY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+
+
+def get_idempotency_scope(view, request):
+    user_id = request.user.pk if request.user and request.user.is_authenticated else None
+    return "%s:%s" % (view.__class__.__name__, user_id or "anonymous")
+
+
+def get_request_fingerprint(request):
+    content = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def idempotent(view_method):
+    @functools.wraps(view_method)
+    def wrapped(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_KEY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > 255:
+            return Response(data={"detail": "Invalid Idempotency-Key."}, status=status.HTTP_400_BAD_REQUEST)
+
+        request_fingerprint = get_request_fingerprint(request)
+        idempotency_key, is_created = claim_idempotency_key(
+            get_idempotency_scope(self, request), key, request_fingerprint
+        )
+        if not is_created:
+            if idempotency_key is not None and idempotency_key.request_fingerprint != request_fingerprint:
+                return Response(
+                    data={"detail": "Idempotency-Key was used for a different request."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if idempotency_key is None or idempotency_key.status_code is None:
+                return Response(
+                    data={"detail": "Request with this Idempotency-Key is still being processed."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            response = Response(data=idempotency_key.response_data, status=idempotency_key.status_code)
+            response["Idempotent-Replayed"] = "true"
+            return response
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            idempotency_key.delete()
+            raise
+
+        if response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            idempotency_key.delete()
+        else:
+            complete_idempotency_key(idempotency_key, response.status_code, response.data)
+        return response
+
+    return wrapped
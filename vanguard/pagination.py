@@ -0,0 +1,80 @@
+import json
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+def get_estimated_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) %s" % (sql), params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class ApproximateCountPaginator(Paginator):
+    exact_count_threshold = 10000
+    is_approximate_count = False
+
+    @cached_property
+    def count(self):
+        estimated_count = get_estimated_count(self.object_list)
+        if estimated_count is None or estimated_count < self.exact_count_threshold:
+            return super().count
+
+        self.is_approximate_count = True
+        return estimated_count
+
+
+class OptionalCursorPagination(CursorPagination):
+    page_size = None
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("-id",)
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, "pagination_ordering", self.ordering)
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    django_paginator_class = ApproximateCountPaginator
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.page.paginator.count,
+                "is_approximate_count": self.page.paginator.is_approximate_count,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class ListPagination(BasePagination):
+    ordering = ("-id",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if getattr(view, "pagination_offset", False) and "page" in request.query_params:
+            self.paginator = ApproximateCountPagination()
+            queryset = queryset.order_by(*getattr(view, "pagination_ordering", self.ordering))
+        else:
+            self.paginator = OptionalCursorPagination()
+
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
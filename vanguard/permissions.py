@@ -4,21 +4,29 @@ from rest_framework.permissions import BasePermission
 from users.enums import UserType
 
 
+def get_user_type_name(user):
+    if not user or not user.is_authenticated:
+        return None
+    if hasattr(user, "token_user_type"):
+        return user.token_user_type
+    return user.user_type.user_type_name if user.user_type else None
+
+
 class IsDeveloperUser(BasePermission):
     def has_permission(self, request: Type[HttpRequest], view):
-        return bool(request.user and request.user.user_type.user_type_name == UserType.DEVELOPER)
+        return get_user_type_name(request.user) == UserType.DEVELOPER
 
 
 class IsAdminUser(BasePermission):
     def has_permission(self, request: Type[HttpRequest], view):
-        return bool(request.user and request.user.user_type.user_type_name == UserType.ADMINISTRATOR)
+        return get_user_type_name(request.user) == UserType.ADMINISTRATOR
 
 
 class IsStaffUser(BasePermission):
     def has_permission(self, request: Type[HttpRequest], view):
-        return bool(request.user and (request.user.user_type.user_type_name == UserType.STAFF or request.user.user_type.user_type_name == UserType.AUDITOR))
+        return get_user_type_name(request.user) in (UserType.STAFF, UserType.AUDITOR)
 
 
 class IsMemberUser(BasePermission):
     def has_permission(self, request: Type[HttpRequest], view):
-        return bool(request.user and request.user.user_type.user_type_name == UserType.MEMBER)
+        return get_user_type_name(request.user) == UserType.MEMBER
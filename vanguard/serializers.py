@@ -2,6 +2,7 @@ from django.db.models import Q
 from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.state import token_backend
 from rest_framework_simplejwt.serializers import (
     TokenObtainPairSerializer,
@@ -11,6 +12,7 @@ from rest_framework_simplejwt.serializers import (
 from rest_framework import exceptions
 from users.enums import UserType
 from users.models import User
+from vanguard.authentication import set_role_claims
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -22,11 +24,7 @@ class UserSerializer(serializers.ModelSerializer):
 class AuthAdminLoginSerializer(TokenObtainPairSerializer, TokenObtainSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
-        token["name"] = user.username
-        token["email_address"] = user.email_address
-        token["user_type"] = user.user_type.user_type_name
-
-        return token
+        return set_role_claims(token, user)
 
     def validate(self, attrs):
         authenticate_kwargs = {
@@ -85,11 +83,7 @@ class AuthAdminLoginSerializer(TokenObtainPairSerializer, TokenObtainSerializer)
 class AuthLoginSerializer(TokenObtainPairSerializer, TokenObtainSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
-        token["name"] = user.username
-        token["email_address"] = user.email_address
-        token["user_type"] = user.user_type.user_type_name
-
-        return token
+        return set_role_claims(token, user)
 
     def validate(self, attrs):
         authenticate_kwargs = {
@@ -159,4 +153,20 @@ class AuthRefreshSerializer(TokenRefreshSerializer):
             self.error_messages["no_active_account"] = _("Account has been deactivated")
             raise exceptions.AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
 
-        return super().validate(attrs)
+        refresh = set_role_claims(self.token_class(attrs["refresh"]), user)
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    pass
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data["refresh"] = str(refresh)
+
+        return data
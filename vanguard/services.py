@@ -1,7 +1,7 @@
 import datetime
 from django.core.signing import Signer, BadSignature
 from tzlocal import get_localzone
-from emails.services import construct_and_send_email_payload, render_template
+from emails.services import queue_email_payload, render_template
 from core.enums import Settings
 from core.services import get_setting
 
@@ -38,7 +38,7 @@ def notify_customer_on_forgot_password_by_email(user, is_member):
                 "title": email_subject + "?",
             },
         )
-        return construct_and_send_email_payload(email_subject, email_body, user.email_address)
+        return queue_email_payload(email_subject, email_body, user.email_address)
 
 
 def verify_forgot_password_link(data):